@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import random
+import queue
 import threading
 import time
 
+from astro_subset import SUBSET_SUM_METHODS, plan_subset_sum
+
 class NuclearSSPSimulator:
+    UI_POLL_MS = 50
+    PROGRESS_INTERVAL = 0.25  # seconds between progress updates from solver threads
+
     def __init__(self, root):
         self.root = root
         self.root.title("SSP Nuclear Physics Simulator")
@@ -334,7 +340,10 @@ class NuclearSSPSimulator:
             }
         }
         
+        # Widget calls from solver threads are queued and run on the Tk thread
+        self.ui_calls = queue.Queue()
         self.setup_ui()
+        self.root.after(self.UI_POLL_MS, self._pump_ui)
         
     def setup_ui(self):
         # Title
@@ -495,7 +504,38 @@ class NuclearSSPSimulator:
                                                  font=('Courier', 9))
         self.log_text.pack(fill='both', expand=True, padx=5, pady=5)
         
+    def in_ui(self, fn, *args, **kwargs):
+        """Runs fn on the Tk thread: directly there, queued from any other thread."""
+        if threading.current_thread() is threading.main_thread():
+            fn(*args, **kwargs)
+        else:
+            self.ui_calls.put((fn, args, kwargs))
+        
+    def _pump_ui(self):
+        while True:
+            try:
+                fn, args, kwargs = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            fn(*args, **kwargs)
+        self.root.after(self.UI_POLL_MS, self._pump_ui)
+        
+    def throttled_progress(self, label):
+        """progress(done, total) for solver threads: status bar and log updates at most every PROGRESS_INTERVAL seconds."""
+        last = [0.0]
+        def progress(done, total):
+            now = time.monotonic()
+            if now - last[0] < self.PROGRESS_INTERVAL and done < total:
+                return
+            last[0] = now
+            self.in_ui(self.status_label.config, text=f"{label}: {done}/{total}")
+            self.add_log(f"  {label} {done}/{total}...", 'white')
+        return progress
+        
     def add_log(self, message, color='white'):
+        if threading.current_thread() is not threading.main_thread():
+            self.in_ui(self.add_log, message, color)
+            return
         timestamp = time.strftime("%H:%M:%S")
         self.log_text.insert('end', f"[{timestamp}] {message}\n", color)
         self.log_text.tag_config('white', foreground='white')
@@ -504,7 +544,7 @@ class NuclearSSPSimulator:
         self.log_text.tag_config('yellow', foreground='#f9ca24')
         self.log_text.tag_config('red', foreground='#e94560')
         self.log_text.see('end')
-        self.root.update()
+        self.root.update_idletasks()
         
     def on_atom_select(self, event=None):
         atom = self.atom_var.get()
@@ -766,6 +806,8 @@ class NuclearSSPSimulator:
         max_count = max(hist) if max(hist) > 0 else 1
         bar_width = width / bins
         
+        solution = set(self.solution or ())
+        solved = any(n in solution for n in self.numbers)
         for i, count in enumerate(hist):
             bar_height = (count / max_count) * (height - 40)
             x0 = i * bar_width
@@ -773,7 +815,7 @@ class NuclearSSPSimulator:
             x1 = (i + 1) * bar_width - 2
             y1 = height - 20
             
-            color = '#00ff41' if self.solution and any(n in self.solution for n in self.numbers) else '#00d4ff'
+            color = '#00ff41' if solved else '#00d4ff'
             self.canvas.create_rectangle(x0, y0, x1, y1, fill=color, outline='#1a1a2e')
         
         # Labels
@@ -788,35 +830,14 @@ class NuclearSSPSimulator:
             
         self.add_log("🔬 Starting Exact DP Algorithm...", 'cyan')
         self.add_log(f"  Building DP table for target={self.target}...", 'white')
+        method, footprint = plan_subset_sum(len(self.numbers), self.target)
+        self.add_log(f"  Reconstruction: {method}, estimated peak memory {footprint / 2**20:.1f} MiB", 'white')
         
-        # DP algorithm
-        dp = [False] * (self.target + 1)
-        dp[0] = True
-        prev = [-1] * (self.target + 1)
-        
-        for idx, num in enumerate(self.numbers):
-            if idx % 50 == 0:
-                self.add_log(f"  Processing orbital {idx}/{len(self.numbers)}...", 'white')
-            for s in range(self.target, num - 1, -1):
-                if not dp[s] and dp[s - num]:
-                    dp[s] = True
-                    prev[s] = s - num
-                    
-        if not dp[self.target]:
-            return None
-            
-        # Reconstruct
-        self.add_log("  Reconstructing solution path...", 'white')
-        subset = []
-        s = self.target
-        while s > 0:
-            prev_s = prev[s]
-            if prev_s == -1:
-                break
-            num = s - prev_s
-            subset.append(num)
-            s = prev_s
-            
+        # Bitset DP: one shift-or per number (packed uint64 NumPy arrays for checkpoints)
+        progress = self.throttled_progress("Processing orbital")
+        subset = SUBSET_SUM_METHODS[method](self.numbers, self.target, progress)
+        if subset is not None:
+            self.add_log(f"  Reconstructed solution path ({method})", 'white')
         return subset
         
     def solve_exact(self):
@@ -826,7 +847,7 @@ class NuclearSSPSimulator:
         
         def run():
             self.running = True
-            self.solve_btn.config(state='disabled')
+            self.in_ui(self.solve_btn.config, state='disabled')
             
             start = time.time()
             result = self.solve_exact_dp()
@@ -949,8 +970,8 @@ class NuclearSSPSimulator:
                 
                 self.add_log(f"\n{'='*60}", 'white')
                 
-                self.status_label.config(text=f"Solution found: {len(self.solution)} orbitals, {sum(self.solution)} keV")
-                self.visualize_distribution()
+                self.in_ui(self.status_label.config, text=f"Solution found: {len(self.solution)} orbitals, {sum(self.solution)} keV")
+                self.in_ui(self.visualize_distribution)
             else:
                 self.add_log(f"\n{'='*60}", 'white')
                 self.add_log("✗ No solution found", 'red')
@@ -964,10 +985,10 @@ class NuclearSSPSimulator:
                 self.add_log(f"    • DP table constraints exceeded", 'white')
                 self.add_log(f"    • Try Annealing method for approximation", 'white')
                 self.add_log(f"\n{'='*60}", 'white')
-                self.status_label.config(text="No solution exists")
+                self.in_ui(self.status_label.config, text="No solution exists")
                 
             self.running = False
-            self.solve_btn.config(state='normal')
+            self.in_ui(self.solve_btn.config, state='normal')
             
         threading.Thread(target=run, daemon=True).start()
         
@@ -978,7 +999,7 @@ class NuclearSSPSimulator:
         
         def run():
             self.running = True
-            self.anneal_btn.config(state='disabled')
+            self.in_ui(self.anneal_btn.config, state='disabled')
             
             self.add_log("🌡 Starting Simulated Annealing...", 'cyan')
             start = time.time()
@@ -1049,7 +1070,7 @@ class NuclearSSPSimulator:
                 
                 self.add_log(f"\n{'='*60}", 'white')
                 
-                self.status_label.config(text=f"Annealing solution: {len(self.solution)} orbitals")
+                self.in_ui(self.status_label.config, text=f"Annealing solution: {len(self.solution)} orbitals")
             else:
                 self.add_log(f"\n{'='*60}", 'white')
                 self.add_log(f"✗ Annealing did not converge to exact solution", 'red')
@@ -1064,10 +1085,10 @@ class NuclearSSPSimulator:
                 self.add_log(f"    • Increase annealing iterations", 'white')
                 self.add_log(f"    • Adjust temperature schedule", 'white')
                 self.add_log(f"\n{'='*60}", 'white')
-                self.status_label.config(text="Annealing failed to converge")
+                self.in_ui(self.status_label.config, text="Annealing failed to converge")
                 
             self.running = False
-            self.anneal_btn.config(state='normal')
+            self.in_ui(self.anneal_btn.config, state='normal')
             
         threading.Thread(target=run, daemon=True).start()
         
@@ -0,0 +1,174 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+from astro_ecm import ecm
+from astro_siqs import siqs
+from subset import AstroPhysicsSolver
+
+# ==========================================
+# 1. TARGET FILES AND RESULT SINK
+# ==========================================
+
+def read_targets(path):
+    """
+    Equations from a target file: one "x * y = N" or raw integer N per line
+    (blank lines and # comments skipped). Raw integers become "x * y = N";
+    any other line is reported and skipped.
+    """
+    with open(path) as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if '=' not in line:
+                try:
+                    line = f"x * y = {int(line)}"
+                except ValueError:
+                    print(f"[Batch] {path}:{lineno}: skipping {line!r} (neither an equation nor an integer)")
+                    continue
+            yield line
+
+
+def completed_targets(path):
+    """
+    Equations already present in a JSONL result file. A torn last line from an
+    interrupted run is truncated away, so appending starts on a clean line.
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    good_end = 0
+    with open(path, 'rb') as fh:
+        for raw in fh:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            if not raw.endswith(b'\n'):
+                break
+            done.add(record['equation'])
+            good_end += len(raw)
+    if good_end < os.path.getsize(path):
+        with open(path, 'r+b') as fh:
+            fh.truncate(good_end)
+    return done
+
+# ==========================================
+# 2. POOL WORKERS
+# ==========================================
+
+_settings = {}
+
+# ECM and SIQS default to one process per CPU; inside a batch worker they run single-process
+_SINGLE_PROCESS_STAGES = {'ecm': partial(ecm, workers=1), 'siqs': partial(siqs, workers=1)}
+
+
+def _init_worker(time_budget, verbose):
+    _settings.update(time_budget=time_budget, verbose=verbose)
+
+
+def _solve_target(equation, steps):
+    """One result record: factors (or None), factor-search method, wall time and annealing steps."""
+    start = time.monotonic()
+    solver = AstroPhysicsSolver()
+    solver.factor_time_budget = _settings['time_budget']
+    # One process per target already; nested scan and factoring pools would oversubscribe
+    solver.scan_workers = 1
+    solver.factor_strategies = [(method, _SINGLE_PROCESS_STAGES.get(method, fn), max_seconds)
+                                for method, fn, max_seconds in solver.factor_strategies]
+    # The solver's log output is dropped unless verbose
+    out = contextlib.nullcontext() if _settings['verbose'] else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with out:
+            res = solver.solve(equation, steps=steps, prefer_integers=True)
+    except Exception as exc:
+        return {'equation': equation, 'factors': None, 'method': None, 'error': repr(exc),
+                'time': round(time.monotonic() - start, 6), 'iterations': solver.last_iterations}
+    factors = None
+    if isinstance(res.get('x'), int) and isinstance(res.get('y'), int):
+        factors = sorted((res['x'], res['y']))
+        # (1, N) is the solver's "no split" answer (prime N or search exhausted), not a factorization
+        if factors[0] == 1:
+            factors = None
+    return {'equation': equation, 'factors': factors, 'method': solver.last_factor_method,
+            'time': round(time.monotonic() - start, 6), 'iterations': solver.last_iterations}
+
+# ==========================================
+# 3. BATCH RUNNER
+# ==========================================
+
+def run_batch(targets_path, output_path, workers=None, steps=1000000, time_budget=30.0, verbose=False):
+    """
+    Solves every target of targets_path with prefer_integers=True on a
+    ProcessPoolExecutor (in-process when only one worker is available),
+    appending one JSON record per target to output_path as soon as it
+    finishes. Targets already recorded there are skipped, so an interrupted
+    run picks up where it stopped. Returns the number of targets solved.
+    """
+    done = completed_targets(output_path)
+    todo = []
+    for equation in read_targets(targets_path):
+        if equation not in done:
+            done.add(equation)
+            todo.append(equation)
+    print(f"[Batch] {len(todo)} targets to solve, {len(done) - len(todo)} already in {output_path}")
+    if not todo:
+        return 0
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+
+    solved = 0
+    with open(output_path, 'a') as sink:
+        def record(rec):
+            nonlocal solved
+            sink.write(json.dumps(rec) + '\n')
+            sink.flush()
+            solved += 1
+            status = f"{rec['factors'][0]} * {rec['factors'][1]}" if rec['factors'] else rec.get('error', 'no factors')
+            print(f"[Batch] {solved}/{len(todo)} {rec['equation']} -> {status} "
+                  f"({rec['method']}, {rec['time']:.3f}s)")
+
+        if workers == 1:
+            _init_worker(time_budget, verbose)
+            for equation in todo:
+                record(_solve_target(equation, steps))
+            return solved
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(time_budget, verbose)) as pool:
+            pending = set()
+            queue = iter(todo)
+            while True:
+                # Keep two targets queued per worker
+                for equation in queue:
+                    pending.add(pool.submit(_solve_target, equation, steps))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record(future.result())
+    return solved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable batch factorization of x * y = N targets.")
+    parser.add_argument('targets', help="file with one 'x * y = N' equation or integer N per line")
+    parser.add_argument('-o', '--output', default='results.jsonl', help="JSONL result file (appended to)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--steps', type=int, default=1000000, help="annealing steps per target")
+    parser.add_argument('--time-budget', type=float, default=30.0,
+                        help="strategy-chain time budget per target (seconds)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show the solver's own log output")
+    args = parser.parse_args(argv)
+    run_batch(args.targets, args.output, args.workers, args.steps, args.time_budget, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
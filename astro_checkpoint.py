@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import time
+
+# ==========================================
+# ATOMIC, TIME-THROTTLED CHECKPOINTS
+# ==========================================
+
+class Checkpointer:
+    """
+    Writes JSON checkpoints to `path` at most once per `interval` seconds, so
+    the overhead is bounded by wall time rather than by step count. Each save
+    goes to a temp file in the same directory, is fsynced and then os.replace()d
+    over the previous checkpoint: a crash leaves either the old or the new file.
+    """
+
+    def __init__(self, path, interval=30.0):
+        self.path = path
+        self.interval = interval
+        self._last = time.monotonic()
+
+    def due(self):
+        return time.monotonic() - self._last >= self.interval
+
+    def save(self, payload):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix='.checkpoint-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(payload, fh)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._last = time.monotonic()
+
+    def maybe_save(self, make_payload):
+        """Saves make_payload() if the interval has elapsed; returns True when it did."""
+        if not self.due():
+            return False
+        self.save(make_payload())
+        return True
+
+
+def load_checkpoint(path):
+    with open(path) as fh:
+        return json.load(fh)
@@ -0,0 +1,229 @@
+import functools
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# ==========================================
+# 1. PARAMETER SCHEDULE
+# ==========================================
+
+# (factor digits, B1, curves) - the standard GMP-ECM table; B2 = 100 * B1.
+ECM_SCHEDULE = [
+    (15, 2000, 25),
+    (20, 11000, 90),
+    (25, 50000, 300),
+    (30, 250000, 700),
+    (35, 1000000, 1800),
+    (40, 3000000, 5100),
+]
+B2_MULTIPLIER = 100
+
+# How often (in stage-1 primes / stage-2 giant steps) a curve polls for cancellation
+_POLL_EVERY = 256
+
+
+def _primes_between(lo, hi):
+    """Primes p with lo <= p < hi, via a NumPy sieve of [lo, hi)."""
+    lo = max(lo, 2)
+    if hi <= lo:
+        return []
+    root = math.isqrt(hi - 1)
+    base = np.ones(root + 1, dtype=bool)
+    base[:2] = False
+    for p in range(2, math.isqrt(root) + 1):
+        if base[p]:
+            base[p * p::p] = False
+    segment = np.ones(hi - lo, dtype=bool)
+    for p in np.flatnonzero(base).tolist():
+        start = max(p * p, -(-lo // p) * p)
+        segment[start - lo::p] = False
+    return (np.flatnonzero(segment) + lo).tolist()
+
+
+@functools.lru_cache(maxsize=8)
+def _stage1_primes(B1):
+    return tuple(_primes_between(2, B1 + 1))
+
+# ==========================================
+# 2. MONTGOMERY CURVE ARITHMETIC (X:Z)
+# ==========================================
+
+def _xdbl(x, z, a24, n):
+    t1 = (x + z) * (x + z) % n
+    t2 = (x - z) * (x - z) % n
+    t3 = t1 - t2
+    return t1 * t2 % n, t3 * (t2 + a24 * t3) % n
+
+
+def _xadd(xp, zp, xq, zq, xd, zd, n):
+    """P + Q given the difference D = P - Q."""
+    u = (xp - zp) * (xq + zq)
+    v = (xp + zp) * (xq - zq)
+    s = u + v
+    t = u - v
+    return zd * s * s % n, xd * t * t % n
+
+
+def _ladder(k, x, z, a24, n):
+    """Montgomery ladder: [k](x:z)."""
+    x0, z0 = x, z
+    x1, z1 = _xdbl(x, z, a24, n)
+    for bit in bin(k)[3:]:
+        if bit == '1':
+            x0, z0 = _xadd(x1, z1, x0, z0, x, z, n)
+            x1, z1 = _xdbl(x1, z1, a24, n)
+        else:
+            x1, z1 = _xadd(x0, z0, x1, z1, x, z, n)
+            x0, z0 = _xdbl(x0, z0, a24, n)
+    return x0, z0
+
+# ==========================================
+# 3. ONE CURVE (STAGE 1 + STAGE 2)
+# ==========================================
+
+_cancel_event = None
+
+
+def _init_worker(event):
+    global _cancel_event
+    _cancel_event = event
+
+
+def _cancelled(deadline):
+    return (_cancel_event is not None and _cancel_event.is_set()) or time.time() > deadline
+
+
+def ecm_curve(n, sigma, B1, B2, deadline=float('inf')):
+    """
+    Runs one Suyama-parametrized Montgomery curve. Stage 1 multiplies by every
+    prime power <= B1; stage 2 is the standard baby-step/giant-step continuation
+    over primes in (B1, B2]. Returns a non-trivial factor, or None.
+    """
+    # Suyama: u = s^2 - 5, v = 4s, (x:z) = (u^3 : v^3), a24 = (v-u)^3 (3u+v) / (16 u^3 v)
+    u = (sigma * sigma - 5) % n
+    v = 4 * sigma % n
+    x, z = pow(u, 3, n), pow(v, 3, n)
+    denom = 16 * pow(u, 3, n) * v % n
+    g = math.gcd(denom, n)
+    if g != 1:
+        return g if g != n else None
+    a24 = pow(v - u, 3, n) * (3 * u + v) * pow(denom, -1, n) % n
+
+    # Stage 1
+    for i, p in enumerate(_stage1_primes(B1)):
+        pk = p
+        while pk * p <= B1:
+            pk *= p
+        x, z = _ladder(pk, x, z, a24, n)
+        if i % _POLL_EVERY == 0 and _cancelled(deadline):
+            return None
+    g = math.gcd(z, n)
+    if g == n:
+        return None
+    if g != 1:
+        return g
+
+    # Stage 2: S[d] = [2d]Q for d = 1..D, giant steps of 2D from an odd B ~ B1
+    D = max(2, math.isqrt(B2 - B1) // 2)
+    S = [None] * (D + 1)
+    S[1] = _xdbl(x, z, a24, n)
+    if D >= 2:
+        S[2] = _xdbl(*S[1], a24, n)
+    for d in range(3, D + 1):
+        S[d] = _xadd(*S[d - 1], *S[1], *S[d - 2], n)
+    beta = [None] + [sx * sz % n for sx, sz in S[1:]]
+
+    B = B1 - 1 if B1 % 2 == 0 else B1
+    rx, rz = _ladder(B, x, z, a24, n)
+    tx, tz = _ladder(B - 2 * D, x, z, a24, n) if B > 2 * D else (None, None)
+    if tx is None:
+        return None
+    acc = 1
+    # Primes (B, B2] are sieved one segment of giant steps at a time
+    segment = 2 * D * _POLL_EVERY
+    for seg_lo in range(B, B2, segment):
+        primes = _primes_between(seg_lo + 1, min(seg_lo + segment, B2) + 1)
+        idx = 0
+        for r in range(seg_lo, min(seg_lo + segment, B2), 2 * D):
+            alpha = rx * rz % n
+            limit = r + 2 * D
+            while idx < len(primes) and primes[idx] <= limit:
+                delta = (primes[idx] - r) // 2
+                sx, sz = S[delta]
+                acc = acc * ((rx - sx) * (rz + sz) - alpha + beta[delta]) % n
+                idx += 1
+            rx, rz, tx, tz = (*_xadd(rx, rz, *S[D], tx, tz, n), rx, rz)
+        if _cancelled(deadline):
+            return None
+    g = math.gcd(acc, n)
+    if 1 < g < n:
+        return g
+    return None
+
+# ==========================================
+# 4. PARALLEL DRIVER
+# ==========================================
+
+def ecm(n, deadline=None, workers=None, schedule=None, seed=None):
+    """
+    Lenstra ECM over the B1/B2 schedule. Curves are farmed out to a
+    ProcessPoolExecutor (in-process when only one worker is available); the
+    first curve to find a factor sets a shared event that stops the others.
+    deadline is a time.monotonic() value, as used by the strategy chain.
+    Returns a non-trivial factor of n, or None.
+    """
+    if n % 2 == 0:
+        return 2
+    remaining = float('inf') if deadline is None else deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    wall_deadline = time.time() + remaining
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(n if seed is None else seed)
+
+    def curves():
+        for _, B1, count in (schedule or ECM_SCHEDULE):
+            for _ in range(count):
+                yield B1, B1 * B2_MULTIPLIER, rng.randrange(6, n - 1)
+
+    if workers == 1:
+        for B1, B2, sigma in curves():
+            if time.time() > wall_deadline:
+                return None
+            factor = ecm_curve(n, sigma, B1, B2, wall_deadline)
+            if factor:
+                return factor
+        return None
+
+    event = multiprocessing.get_context().Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(event,)) as pool:
+        pending = set()
+        found = None
+        todo = curves()
+        try:
+            while found is None and time.time() <= wall_deadline:
+                # Keep two curves queued per worker so the pool never idles
+                for B1, B2, sigma in todo:
+                    pending.add(pool.submit(ecm_curve, n, sigma, B1, B2, wall_deadline))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(pending, timeout=max(0.0, wall_deadline - time.time()),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    factor = future.result()
+                    if factor:
+                        found = factor
+                        break
+        finally:
+            event.set()
+            for future in pending:
+                future.cancel()
+    return found
@@ -0,0 +1,384 @@
+import ast
+import math
+
+import numpy as np
+
+# ==========================================
+# 1. EQUATION COMPILER
+# ==========================================
+
+# Supported grammar: numbers, variable names, unary +/- and the binary
+# operators + - * / **. Anything else is rejected before compilation.
+_ALLOWED_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)
+_ALLOWED_UNARYOPS = (ast.UAdd, ast.USub)
+
+
+class _SlotRewriter(ast.NodeTransformer):
+    """Replaces every variable name with a positional lookup `_v[slot]`."""
+
+    def __init__(self, slots):
+        self.slots = slots
+
+    def visit_Name(self, node):
+        return ast.copy_location(
+            ast.Subscript(
+                value=ast.Name(id='_v', ctx=ast.Load()),
+                slice=ast.Constant(value=self.slots[node.id]),
+                ctx=ast.Load(),
+            ),
+            node,
+        )
+
+
+def _validate(node, names):
+    """Walks the expression tree, collecting variable names in first-seen order."""
+    if isinstance(node, ast.Expression):
+        _validate(node.body, names)
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, _ALLOWED_BINOPS):
+        _validate(node.left, names)
+        _validate(node.right, names)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _ALLOWED_UNARYOPS):
+        _validate(node.operand, names)
+    elif isinstance(node, ast.Name):
+        if node.id not in names:
+            names.append(node.id)
+    elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        pass
+    else:
+        raise ValueError(f"Unsupported expression element: {ast.dump(node)}")
+
+
+# ==========================================
+# 2. FORWARD-MODE AUTOMATIC DIFFERENTIATION
+# ==========================================
+
+class Dual:
+    """
+    Dual number val + sum(der[i] * eps_i) with a sparse tangent per variable slot.
+    The compiled LHS code object accepts these in place of plain numbers, so one
+    evaluation yields the value and every partial derivative.
+    """
+    __slots__ = ('val', 'der')
+
+    def __init__(self, val, der=None):
+        self.val = val
+        self.der = der if der is not None else {}
+
+    @staticmethod
+    def _lift(other):
+        return other if isinstance(other, Dual) else Dual(other)
+
+    @staticmethod
+    def _combine(a_der, a_scale, b_der, b_scale):
+        der = {k: d * a_scale for k, d in a_der.items()}
+        for k, d in b_der.items():
+            der[k] = der.get(k, 0.0) + d * b_scale
+        return der
+
+    def __add__(self, other):
+        other = Dual._lift(other)
+        return Dual(self.val + other.val, Dual._combine(self.der, 1.0, other.der, 1.0))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = Dual._lift(other)
+        return Dual(self.val - other.val, Dual._combine(self.der, 1.0, other.der, -1.0))
+
+    def __rsub__(self, other):
+        return Dual._lift(other) - self
+
+    def __mul__(self, other):
+        other = Dual._lift(other)
+        return Dual(self.val * other.val, Dual._combine(self.der, other.val, other.der, self.val))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        other = Dual._lift(other)
+        q = self.val / other.val
+        return Dual(q, Dual._combine(self.der, 1.0 / other.val, other.der, -q / other.val))
+
+    def __rtruediv__(self, other):
+        return Dual._lift(other) / self
+
+    def __pow__(self, other):
+        if not isinstance(other, Dual):
+            # d(a^c) = c * a^(c-1) * da
+            p = self.val ** other
+            scale = other * self.val ** (other - 1) if other != 0 else 0.0
+            return Dual(p, {k: d * scale for k, d in self.der.items()})
+        p = self.val ** other.val
+        # d(a^b) = a^b * (b * da / a + ln(a) * db)
+        a_scale = p * other.val / self.val if self.der else 0.0
+        if not other.der:
+            b_scale = 0.0
+        elif isinstance(self.val, np.ndarray):
+            b_scale = p * np.log(np.where(self.val > 0, self.val, 1.0))
+        else:
+            b_scale = p * math.log(self.val) if self.val > 0 else 0.0
+        return Dual(p, Dual._combine(self.der, a_scale, other.der, b_scale))
+
+    def __rpow__(self, other):
+        return Dual._lift(other) ** self
+
+    def __neg__(self):
+        return Dual(-self.val, {k: -d for k, d in self.der.items()})
+
+    def __pos__(self):
+        return self
+
+
+# ==========================================
+# 3. MONOMIAL ANALYZER (CLOSED-FORM LOG SPACE)
+# ==========================================
+
+_MAX_TERMS = 64
+
+
+def _constant_value(node):
+    """Numeric value of a constant (optionally signed) exponent node, else None."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, _ALLOWED_UNARYOPS):
+        inner = _constant_value(node.operand)
+        if inner is None:
+            return None
+        return -inner if isinstance(node.op, ast.USub) else inner
+    return None
+
+
+def _expand_terms(node):
+    """
+    Expands an expression into a sum of monomials [(coef, {name: exponent})].
+    Returns None when the expression is not a (finite) sum of monomials.
+    """
+    if isinstance(node, ast.Constant):
+        return [(float(node.value), {})]
+    if isinstance(node, ast.Name):
+        return [(1.0, {node.id: 1.0})]
+    if isinstance(node, ast.UnaryOp):
+        terms = _expand_terms(node.operand)
+        if terms is None or isinstance(node.op, ast.UAdd):
+            return terms
+        return [(-c, e) for c, e in terms]
+    if not isinstance(node, ast.BinOp):
+        return None
+
+    if isinstance(node.op, ast.Pow):
+        power = _constant_value(node.right)
+        base = _expand_terms(node.left)
+        if power is None or base is None or len(base) != 1:
+            return None
+        coef, exps = base[0]
+        if coef < 0 and not float(power).is_integer():
+            return None
+        return [(coef ** power, {k: v * power for k, v in exps.items()})]
+
+    left = _expand_terms(node.left)
+    right = _expand_terms(node.right)
+    if left is None or right is None:
+        return None
+    if isinstance(node.op, ast.Add):
+        terms = left + right
+    elif isinstance(node.op, ast.Sub):
+        terms = left + [(-c, e) for c, e in right]
+    elif isinstance(node.op, ast.Mult):
+        terms = []
+        for lc, le in left:
+            for rc, re_ in right:
+                exps = dict(le)
+                for k, v in re_.items():
+                    exps[k] = exps.get(k, 0.0) + v
+                terms.append((lc * rc, exps))
+    elif isinstance(node.op, ast.Div):
+        if len(right) != 1 or right[0][0] == 0:
+            return None
+        rc, re_ = right[0]
+        terms = []
+        for lc, le in left:
+            exps = dict(le)
+            for k, v in re_.items():
+                exps[k] = exps.get(k, 0.0) - v
+            terms.append((lc / rc, exps))
+    else:
+        return None
+    if len(terms) > _MAX_TERMS:
+        return None
+    return terms
+
+
+def analyze_monomials(tree):
+    """
+    Classifies an LHS as a sum of positive monomials sum_k c_k * prod_i x_i^a_ki.
+    Returns [(c_k, {name: a_ki})] with zero exponents dropped, or None for
+    anything else (negative terms, sums inside powers or denominators, ...).
+    """
+    body = tree.body if isinstance(tree, ast.Expression) else tree
+    terms = _expand_terms(body)
+    if not terms:
+        return None
+    cleaned = []
+    for coef, exps in terms:
+        if coef <= 0:
+            return None
+        cleaned.append((coef, {k: v for k, v in exps.items() if v != 0}))
+    return cleaned
+
+
+# ==========================================
+# 4. COMPILED EQUATION
+# ==========================================
+
+class CompiledEquation:
+    """
+    Parses an equation LHS once and compiles it to a code object that reads
+    variables from positional slots: fn(values) where values[i] belongs to names[i].
+    """
+
+    def __init__(self, lhs_str):
+        self.source = lhs_str.strip()
+        try:
+            tree = ast.parse(self.source, mode='eval')
+        except SyntaxError as exc:
+            raise ValueError(f"Cannot parse equation LHS: {self.source!r}") from exc
+
+        names = []
+        _validate(tree, names)
+        self.names = names
+        self.slots = {name: i for i, name in enumerate(names)}
+        self.tree = tree
+        self.monomials = analyze_monomials(tree)
+
+        body = _SlotRewriter(self.slots).visit(ast.parse(self.source, mode='eval').body)
+        lam = ast.Expression(
+            body=ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[], args=[ast.arg(arg='_v')], vararg=None,
+                    kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[],
+                ),
+                body=body,
+            )
+        )
+        ast.fix_missing_locations(lam)
+        self.fn = eval(compile(lam, f"<equation {self.source}>", 'eval'), {'__builtins__': {}})
+
+    def __call__(self, values):
+        return self.fn(values)
+
+    def is_xy_product(self):
+        """True when the LHS is exactly x * y (the integer factoring form)."""
+        return self.monomials == [(1, {'x': 1, 'y': 1})]
+
+    def log_gradient(self, values):
+        """
+        Returns (lhs, sens) from one forward-mode pass, where sens[i] is the
+        log-log slope d log(lhs) / d log(values[i]). Slopes are 0.0 wherever
+        the LHS is non-positive or non-finite, since log(lhs) is undefined there.
+        """
+        result = self.fn([Dual(v, {i: 1.0}) for i, v in enumerate(values)])
+        if not isinstance(result, Dual):
+            return result, [0.0] * len(values)
+        lhs = result.val
+        if not (lhs > 0 and math.isfinite(lhs)):
+            return lhs, [0.0] * len(values)
+        der = result.der
+        return lhs, [values[i] * der.get(i, 0.0) / lhs for i in range(len(values))]
+
+    def log_gradient_batch(self, columns):
+        """
+        Array form of log_gradient: columns[i] holds variable i for every
+        instance. Returns (lhs, sens) with shapes (B,) and (B, n).
+        """
+        batch = len(columns[0]) if columns else 0
+        result = self.fn([Dual(col, {i: 1.0}) for i, col in enumerate(columns)])
+        if not isinstance(result, Dual):
+            lhs = np.broadcast_to(np.asarray(result, dtype=float), (batch,))
+            return lhs, np.zeros((batch, len(columns)))
+        lhs = np.broadcast_to(np.asarray(result.val, dtype=float), (batch,))
+        sens = np.zeros((batch, len(columns)))
+        valid = (lhs > 0) & np.isfinite(lhs)
+        for i, col in enumerate(columns):
+            if i in result.der:
+                sens[:, i] = np.where(valid, col * result.der[i] / np.where(valid, lhs, 1.0), 0.0)
+        return lhs, sens
+
+    def log_space_seed(self, log_target):
+        """
+        Closed-form start for sum-of-monomial LHS forms. Taking log10 of each
+        term c_k * prod x_i^a_ki and asking every term to carry an equal share of
+        the target gives the linear system A u = b in u_i = log10(x_i), solved by
+        least squares (minimum norm, i.e. balanced, when underdetermined).
+        Returns log10 values per slot, or None for non-monomial equations.
+        """
+        if self.monomials is None or not self.names:
+            return None
+        const_sum = sum(c for c, exps in self.monomials if not exps)
+        var_terms = [(c, exps) for c, exps in self.monomials if exps]
+        if not var_terms:
+            return None
+
+        # Constant terms are moved to the right-hand side: log10(N - C)
+        remainder = 1.0 - const_sum * 10.0 ** (-log_target) if log_target < 300 else 1.0
+        if remainder <= 0:
+            return None
+        log_share = log_target + math.log10(remainder) - math.log10(len(var_terms))
+
+        A = np.zeros((len(var_terms), len(self.names)))
+        b = np.empty(len(var_terms))
+        for k, (coef, exps) in enumerate(var_terms):
+            for name, power in exps.items():
+                A[k, self.slots[name]] = power
+            b[k] = log_share - math.log10(coef)
+        u = np.linalg.lstsq(A, b, rcond=None)[0]
+        if not np.all(np.isfinite(u)):
+            return None
+        return [float(v) for v in u]
+
+
+# ==========================================
+# 5. BATCHED ANNEALING KERNEL
+# ==========================================
+
+def anneal_batch(lhs_fn, log_targets, vals, steps, gain, dt):
+    """
+    Runs the AstroDomain.update_multiplicative dynamics for many targets of the
+    same LHS at once. vals is a (targets x variables) float array updated in
+    place; instances drop out of the active mask as soon as they converge.
+    Returns the number of iterations each instance ran.
+    """
+    log_targets = np.asarray(log_targets, dtype=float)
+    batch, n = vals.shape
+    velocity = np.zeros_like(vals)
+    iterations = np.full(batch, steps, dtype=np.int64)
+    active = np.arange(batch)
+
+    with np.errstate(all='ignore'):
+        for step in range(steps):
+            if active.size == 0:
+                break
+            state = vals[active]
+            lhs, sens = lhs_fn.log_gradient_batch([state[:, i] for i in range(n)])
+
+            # Current log magnitude (same clamping as the scalar loop)
+            lhs = np.where((lhs > 0) & ~np.isnan(lhs), lhs, 1e-100)
+            error = np.log10(lhs) - log_targets[active]
+
+            converged = np.abs(error) < 1e-8
+            if converged.any():
+                iterations[active[converged]] = step
+                keep = ~converged
+                active, state, sens, error = active[keep], state[keep], sens[keep], error[keep]
+                if active.size == 0:
+                    break
+
+            sens = np.where(np.abs(sens) < 0.001, 1.0, sens)
+            force = (-error[:, None] / sens) * gain
+
+            # Damped velocity, capped 10% step, multiplicative update, safety floor
+            vel = velocity[active] * 0.8 + force * 0.2
+            velocity[active] = vel
+            state = state * (1.0 + np.clip(vel * dt, -0.1, 0.1))
+            vals[active] = np.maximum(state, 1e-100)
+
+    return iterations
@@ -0,0 +1,374 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from astro_ecm import ecm
+from astro_primes import is_probable_prime, product_tree, small_factor
+from astro_siqs import siqs
+
+# ==========================================
+# 1. POLLARD-BRENT RHO
+# ==========================================
+
+def pollard_brent(n, deadline=None, batch=128, seed=None):
+    """
+    Brent's variant of Pollard rho: cycle detection by power-of-two jumps and
+    one gcd per `batch` steps on the accumulated product of |x - y|.
+    Returns a non-trivial factor of composite n, or None when the deadline
+    (time.monotonic() value) passes first.
+    """
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n if seed is None else seed)
+    while True:
+        y = rng.randrange(1, n)
+        c = rng.randrange(1, n)
+        g = r = q = 1
+        x = ys = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += batch
+                if deadline is not None and time.monotonic() > deadline:
+                    return None
+            r *= 2
+        if g == n:
+            # Batched product collapsed to n: replay the last batch one step at a time
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+        # Degenerate cycle for this (y, c); retry with fresh parameters
+
+# ==========================================
+# 2. FERMAT / LEHMAN NEAR-SQUARE SEARCH
+# ==========================================
+
+# Small moduli for the quadratic-residue prefilter; their product is the
+# period of the combined lookup table.
+_QR_MODULI = (64, 63, 65, 11)
+_QR_PERIOD = math.prod(_QR_MODULI)
+_QR_SQUARES = {q: np.bincount(np.arange(q) ** 2 % q, minlength=q) > 0 for q in _QR_MODULI}
+_QR_INDEX = {q: (np.arange(_QR_PERIOD) % q).astype(np.uint8) for q in _QR_MODULI}
+
+
+def _fermat_table(m):
+    """
+    Lookup table over a mod _QR_PERIOD: True where a^2 - m can be a square
+    modulo every prefilter modulus. Built per target from the small per-modulus tables.
+    """
+    ok = np.ones(_QR_PERIOD, dtype=bool)
+    for q in _QR_MODULI:
+        a = np.arange(q)
+        ok &= _QR_SQUARES[q][(a * a - m % q) % q][_QR_INDEX[q]]
+    return ok.tobytes()
+
+
+def _fermat_walk(m, max_steps, deadline, start=0):
+    """
+    Finds a >= max(ceil(sqrt(m)), start) with a^2 - m = b^2 in at most
+    max_steps steps. r = a^2 - m is advanced incrementally (r += 2a + 1); only
+    values passing the residue table reach isqrt. Returns (a, b) or None.
+    """
+    a = math.isqrt(m)
+    if a * a < m:
+        a += 1
+    a = max(a, start)
+    r = a * a - m
+    table = _fermat_table(m)
+    pos = a % _QR_PERIOD
+    for step in range(max_steps):
+        if table[pos]:
+            b = math.isqrt(r)
+            if b * b == r:
+                return a, b
+        r += 2 * a + 1
+        a += 1
+        pos += 1
+        if pos == _QR_PERIOD:
+            pos = 0
+        if step & 0xFFFF == 0 and deadline is not None and time.monotonic() > deadline:
+            return None
+    return None
+
+
+def fermat_lehman(n, deadline=None, max_steps=1000000, max_multiplier=30, hint=None):
+    """
+    Near-square factoring for balanced n = p * q. Fermat's method on n itself
+    needs about (p - q)^2 / (8 sqrt(n)) steps; Lehman-style multipliers then
+    search a^2 - 4kn = b^2 (k = 2..max_multiplier), which catches factor
+    ratios close to small fractions. hint, an approximate factor, centres the
+    first walk on a = (hint + n / hint) / 2 (from sqrt(n) for a balanced hint).
+    Returns a non-trivial factor or None.
+    """
+    if n % 2 == 0:
+        return 2
+    if is_probable_prime(n):
+        return None
+    start = 0
+    if hint is not None and hint >= 1:
+        hint = int(hint)
+        start = (hint + n // hint) // 2 - max_steps // 2
+    hit = _fermat_walk(n, max_steps, deadline, start)
+    if hit is not None:
+        a, b = hit
+        if 1 < a - b < n:
+            return a - b
+    for k in range(2, max_multiplier + 1):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        hit = _fermat_walk(4 * k * n, max(1, max_steps // (4 * k)), deadline)
+        if hit is not None:
+            g = math.gcd(hit[0] - hit[1], n)
+            if 1 < g < n:
+                return g
+    return None
+
+# ==========================================
+# 3. WORD-SIZED FAST PATH (N < 2^64)
+# ==========================================
+
+WORD_LIMIT = 1 << 64
+_SQUFOF_MULTIPLIERS = (1, 3, 5, 7, 11, 3 * 5, 3 * 7, 3 * 11, 5 * 7, 5 * 11, 7 * 11,
+                       3 * 5 * 7, 3 * 5 * 11, 3 * 7 * 11, 5 * 7 * 11, 3 * 5 * 7 * 11)
+
+
+def hart_one_line(n, max_iter=1 << 14):
+    """
+    Hart's one-line factoring: s = ceil(sqrt(n*i)), and when s^2 mod n is a
+    square t^2, gcd(s - t, n) splits n. Fast for factors up to ~ n^(1/3).
+    """
+    ni = 0
+    for _ in range(max_iter):
+        ni += n
+        s = math.isqrt(ni)
+        if s * s != ni:
+            s += 1
+        m = s * s % n
+        t = math.isqrt(m)
+        if t * t == m:
+            g = math.gcd(s - t, n)
+            if 1 < g < n:
+                return g
+    return None
+
+
+def squfof(n):
+    """
+    Shanks' square forms factorization with the usual multiplier list;
+    O(n^(1/4)) steps on word-sized operands. Returns a factor or None.
+    """
+    root = math.isqrt(n)
+    if root * root == n:
+        return root
+    bound = 3 * 2 * math.isqrt(2 * root)
+    for k in _SQUFOF_MULTIPLIERS:
+        D = k * n
+        P0 = math.isqrt(D)
+        if P0 * P0 == D:
+            g = math.gcd(n, P0)
+            if 1 < g < n:
+                return g
+            continue
+        # Forward cycle until Q is a square at an even step
+        P_prev = P = P0
+        Q_prev, Q = 1, D - P0 * P0
+        r = None
+        for i in range(2, bound):
+            b = (P0 + P) // Q
+            P = b * Q - P
+            q = Q
+            Q = Q_prev + b * (P_prev - P)
+            s = math.isqrt(Q)
+            if i % 2 == 0 and s * s == Q:
+                r = s
+                break
+            Q_prev, P_prev = q, P
+        if r is None:
+            continue
+        # Reverse cycle from the square root form until P repeats
+        b = (P0 - P) // r
+        P_prev = P = b * r + P
+        Q_prev = r
+        Q = (D - P_prev * P_prev) // Q_prev
+        for _ in range(bound):
+            b = (P0 + P) // Q
+            P_prev = P
+            P = b * Q - P
+            q = Q
+            Q = Q_prev + b * (P_prev - P)
+            Q_prev = q
+            if P == P_prev:
+                break
+        g = math.gcd(n, Q_prev)
+        if 1 < g < n:
+            return g
+    return None
+
+
+def factor_word(n):
+    """
+    One non-trivial factor of a composite n < 2^64: a small-prime gcd, SQUFOF
+    below 2^40 (where its n^(1/4) cycle is short), a short run of Hart's
+    one-line method and finally Brent rho. All operands stay below 2^128.
+    Returns None for primes and n < 4.
+    """
+    if n < 4 or is_probable_prime(n):
+        return None
+    p = small_factor(n, 1 << 10)
+    if p is not None:
+        return p
+    if n < 1 << 40:
+        p = squfof(n)
+        if p is not None:
+            return p
+    return hart_one_line(n, 1 << 10) or pollard_brent(n)
+
+
+def factor_word_primes(n):
+    """Full factorization of 1 <= n < 2^64 through factor_word. Sorted primes, with multiplicity."""
+    primes, stack = [], [n]
+    while stack:
+        m = stack.pop()
+        if m == 1:
+            continue
+        factor = factor_word(m)
+        if factor is None:
+            primes.append(m)
+        else:
+            stack.extend((factor, m // factor))
+    return sorted(primes)
+
+
+def divisors(primes):
+    """All divisors of prod(primes), sorted, from a prime list with multiplicity."""
+    divs = [1]
+    for p in sorted(set(primes)):
+        power, powers = 1, []
+        for _ in range(primes.count(p)):
+            power *= p
+            powers.append(power)
+        divs += [d * q for d in divs for q in powers]
+    return sorted(divs)
+
+# ==========================================
+# 4. STRATEGY CHAIN
+# ==========================================
+
+# Each strategy is (method_name, fn(n, deadline) -> factor or None, max_seconds).
+# The chain is tried in order; max_seconds (None = no cap) keeps an early stage
+# from spending the whole budget. Callers may pass their own list to add,
+# reorder or re-time stages. Fermat/Lehman is not a chain stage: the engines
+# run it first, on the annealer's hint, under its own short cap.
+DEFAULT_STRATEGIES = [
+    ('pollard_brent', pollard_brent, 2.0),
+    ('ecm', ecm, None),
+]
+
+# The quadratic sieve's cost depends only on N, so it is the stage for balanced
+# semiprimes, where ECM is weakest. It only runs once rho and a capped ECM pass
+# (which splits anything with a factor up to ~20 digits) have failed.
+SIEVE_STRATEGIES = [
+    ('pollard_brent', pollard_brent, 2.0),
+    ('ecm', ecm, 10.0),
+    ('siqs', siqs, None),
+]
+
+
+def find_factor(n, strategies=None, time_budget=30.0):
+    """
+    Runs the strategy chain on n under a shared wall-clock budget (seconds);
+    word-sized n (< 2^64) take the factor_word fast path instead.
+    Returns (factor, method) with 1 < factor < n, or (None, None).
+    """
+    if n < 4 or is_probable_prime(n):
+        return None, None
+    if n < WORD_LIMIT:
+        return factor_word(n), 'word'
+    deadline = time.monotonic() + time_budget
+    for method, strategy, max_seconds in (strategies if strategies is not None else DEFAULT_STRATEGIES):
+        now = time.monotonic()
+        if now > deadline:
+            break
+        stage_deadline = deadline if max_seconds is None else min(deadline, now + max_seconds)
+        factor = strategy(n, stage_deadline)
+        if factor is not None and 1 < factor < n and n % factor == 0:
+            return factor, method
+    return None, None
+
+
+def factorize(n, strategies=None, time_budget=30.0):
+    """
+    Splits n recursively with the strategy chain. Returns (primes, leftover):
+    the prime factors found (sorted, with multiplicity) and the product of any
+    composite parts the budget did not crack (1 when fully factored).
+    """
+    deadline = time.monotonic() + time_budget
+    primes, leftover = [], 1
+    stack = [n]
+    while stack:
+        m = stack.pop()
+        if m == 1:
+            continue
+        if is_probable_prime(m):
+            primes.append(m)
+            continue
+        factor, _ = find_factor(m, strategies, max(0.0, deadline - time.monotonic()))
+        if factor is None:
+            leftover *= m
+            continue
+        stack.extend((factor, m // factor))
+    return sorted(primes), leftover
+
+# ==========================================
+# 5. BATCH GCD ACROSS TARGETS
+# ==========================================
+
+def batch_gcd(moduli):
+    """
+    Bernstein's batch GCD: gcd(N_i, prod of the other N_j) for every i, in
+    quasi-linear time. The product tree's root is reduced modulo N_i^2 down a
+    remainder tree; (P mod N_i^2) / N_i is then (P / N_i) mod N_i.
+    A result of 1 means N_i shares no prime with the rest; N_i itself means
+    every prime of N_i is shared (or N_i is repeated).
+    """
+    moduli = list(moduli)
+    if len(moduli) < 2:
+        return [1] * len(moduli)
+    tree = product_tree(moduli)
+    rems = tree[-1]
+    for level in reversed(tree[:-1]):
+        rems = [rems[i // 2] % (m * m) for i, m in enumerate(level)]
+    return [math.gcd(r // n, n) for r, n in zip(rems, moduli)]
+
+
+def shared_factor_pairs(moduli):
+    """
+    Splits every modulus that shares a prime with another one in the list.
+    Returns {N: (a, b)} with 1 < a <= b and a * b == N. Repeated moduli are
+    collapsed first; a modulus whose primes are all shared is split by pairwise
+    gcds against the others.
+    """
+    unique = sorted(set(n for n in moduli if n > 3))
+    pairs = {}
+    for n, g in zip(unique, batch_gcd(unique)):
+        if g == 1:
+            continue
+        if g == n:
+            g = next((d for d in (math.gcd(n, m) for m in unique if m != n) if 1 < d < n), None)
+            if g is None:
+                continue
+        pairs[n] = (min(g, n // g), max(g, n // g))
+    return pairs
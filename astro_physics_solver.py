@@ -1,7 +1,14 @@
 import math
 import warnings
 import sys
-import random
+import re
+import time
+
+from astro_equation import CompiledEquation
+from astro_factor import (SIEVE_STRATEGIES, WORD_LIMIT, factor_word_primes, factorize, fermat_lehman,
+                          shared_factor_pairs)
+from astro_primes import is_probable_prime, small_factor
+from astro_state import IntegerAstroState, fixed_log10
 
 sys.setrecursionlimit(2000)
 warnings.filterwarnings("ignore")
@@ -11,81 +18,52 @@ warnings.filterwarnings("ignore")
 # ==========================================
 
 class AstroDomain:
-    def __init__(self, name, initial_scale=10):
-        self.name = name
+    """Thin view onto one slot of an IntegerAstroState (fixed-point log10 values live in the state lists)."""
+    __slots__ = ('state', 'slot')
+
+    def __init__(self, name, initial_scale=10, state=None):
         # Integer-based value with fixed-point precision (scale by 10^18 for sub-integer precision)
-        self.val = initial_scale
-        self.velocity = 0
-        self.scale = 10**18  # Fixed-point precision multiplier
+        self.state = state if state is not None else IntegerAstroState()
+        self.slot = self.state.add(name, initial_scale)
+
+    @property
+    def name(self):
+        return self.state.names[self.slot]
+
+    @property
+    def scale(self):
+        return self.state.scale
+
+    @property
+    def val(self):
+        return self.state.value(self.slot)
+
+    @val.setter
+    def val(self, value):
+        self.state.set_value(self.slot, value)
+
+    @property
+    def log_val(self):
+        return self.state.log_val[self.slot]
+
+    @log_val.setter
+    def log_val(self, value):
+        self.state.log_val[self.slot] = value
+
+    @property
+    def velocity(self):
+        return self.state.velocity[self.slot]
+
+    @velocity.setter
+    def velocity(self, value):
+        self.state.velocity[self.slot] = value
         
     def update_multiplicative(self, force_int, dt_scaled):
         """
         Integer-only multiplicative update using fixed-point arithmetic.
-        val_new = val_old * (1 + velocity * dt)
-        All operations in integer domain with scaling.
+        val_new = val_old * (1 + velocity * dt), carried out on log10(val)
         """
-        # Damping: velocity = 0.8*velocity + 0.2*force (scaled by 10^18)
-        self.velocity = (self.velocity * 8 + force_int * 2) // 10
-        
-        # Cap velocity: -0.1 to +0.1 (scaled: -10^17 to +10^17)
-        max_velocity = self.scale // 10  # 0.1 scaled
-        if self.velocity > max_velocity:
-            self.velocity = max_velocity
-        elif self.velocity < -max_velocity:
-            self.velocity = -max_velocity
-        
-        # Apply: val = val * (1 + velocity * dt)
-        # dt_scaled is dt * 10^18, velocity is scaled
-        step_change = (self.velocity * dt_scaled) // (self.scale * self.scale)
-        
-        # val = val + val * step_change / scale
-        delta = (self.val * step_change) // self.scale
-        self.val += delta
-        
-        # Safety floor
-        if self.val < 1:
-            self.val = 1
-
-# ==========================================
-# PRIME VALIDATION (Integer-Based Miller-Rabin)
-# ==========================================
-
-def is_prime_miller_rabin(n, k=40):
-    """
-    Integer-only Miller-Rabin primality test.
-    """
-    if n <= 1:
-        return False
-    if n <= 3:
-        return True
-    if n % 2 == 0:
-        return False
-    
-    # Write n-1 as 2^r * d
-    r, d = 0, n - 1
-    while d % 2 == 0:
-        r += 1
-        d //= 2
-    
-    # Deterministic witnesses for n < 2^64
-    if n < 2**64:
-        witnesses = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
-    else:
-        witnesses = [random.randrange(2, min(n - 2, 2**64)) for _ in range(k)]
-    
-    for a in witnesses:
-        if a >= n:
-            continue
-        x = pow(a, d, n)
-        if x == 1 or x == n - 1:
-            continue
-        for _ in range(r - 1):
-            x = pow(x, 2, n)
-            if x == n - 1:
-                break
-        else:
-            return False
-    return True
+        self.state.update_multiplicative(self.slot, force_int, dt_scaled)
 
 # ==========================================
 # 2. INTEGER-BASED LOG-SCALE MATH ENGINE
@@ -93,20 +71,22 @@ def is_prime_miller_rabin(n, k=40):
 
 class AstroPhysicsSolver:
     def __init__(self):
+        self.state = IntegerAstroState()
         self.variables = {}
+        # Pluggable factor-search stages and their shared wall-clock budget (seconds)
+        # (rho, capped ECM, then the quadratic sieve once those have failed)
+        self.factor_strategies = list(SIEVE_STRATEGIES)
+        self.factor_time_budget = 30.0
+        # First integer stage: Fermat/Lehman on the annealer's hint, capped in steps and seconds
+        self.fermat_max_steps = 1000000
+        self.near_square_seconds = 2.0
         
     def create_var(self, name, rough_magnitude):
-        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude)
+        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude, state=self.state)
     
     def _integer_log10(self, n):
         """Calculate log10 using integer arithmetic (returns scaled by 10^18)"""
-        if n <= 0:
-            return -100 * (10**18)
-        
-        # Use bit_length for fast approximation: log10(n) ≈ bit_length * log10(2)
-        # log10(2) ≈ 0.30102999566 ≈ 301029995664 / 10^12
-        bit_len = n.bit_length()
-        return (bit_len * 301029995664 * (10**6)) // (10**12)
+        return fixed_log10(n, 10**18)
     
     def _integer_pow10(self, log_val_scaled):
         """Calculate 10^x using integer arithmetic (log_val_scaled is scaled by 10^18)"""
@@ -119,6 +99,21 @@ class AstroPhysicsSolver:
             return 1 << min(bits, 10000)  # Cap to prevent overflow
         return 10 ** exponent
     
+    def _near_square_stage(self, target_int, approx_x):
+        """
+        Fermat/Lehman search centred on the hint approx_x; returns a prime pair or None.
+        """
+        print(f"[Integer Near-Square] Fermat/Lehman from the hint, {self.fermat_max_steps} steps...")
+        deadline = time.monotonic() + min(self.near_square_seconds, self.factor_time_budget)
+        factor = fermat_lehman(target_int, deadline, self.fermat_max_steps, hint=approx_x)
+        if factor is None:
+            return None
+        i, j = sorted((factor, target_int // factor))
+        if is_probable_prime(i) and is_probable_prime(j):
+            print(f"[✓ Prime Factors] {i} * {j} = {target_int}")
+            return i, j
+        return None
+    
     def _find_integer_factors(self, target_int, approx_x, approx_y, search_radius=1000000):
         """
         Integer-only factor search with prime validation.
@@ -130,57 +125,72 @@ class AstroPhysicsSolver:
         if approx_x > approx_y:
             approx_x, approx_y = approx_y, approx_x
         
-        best_pair = None
+        # Word-sized targets: SQUFOF / Hart / rho fast path, no scans
+        if target_int < WORD_LIMIT:
+            primes = factor_word_primes(target_int)
+            print(f"[Integer Word Fast Path] {target_int} = {' * '.join(map(str, primes))}")
+            if len(primes) == 2:
+                print(f"[✓ Prime Factors] {primes[0]} * {primes[1]} = {target_int}")
+                return primes[0], primes[1]
+            print(f"[✗ No Prime Factors] {len(primes)} prime factors - no prime pair exists")
+            return None
+        
         min_diff = 2**256  # Large integer
         
         # Integer square root
         sqrt_n = math.isqrt(target_int)
         
-        print(f"[Integer Brute Force] Searching near sqrt(N) = {sqrt_n}")
-        
-        # Local search near approximations
-        start = max(2, approx_x - search_radius)
-        end = min(approx_x + search_radius, sqrt_n)
+        # Near-square search first: Fermat/Lehman from the annealer's balanced hint
+        # replaces the linear scan as the opening stage, under its own step and time cap
+        best_pair = self._near_square_stage(target_int, approx_x)
         
-        checked = 0
-        for cand_x in range(end, start - 1, -1):
-            checked += 1
-            if checked > 1000000:  # Limit checks
-                break
+        if best_pair is None:
+            print(f"[Integer Brute Force] Searching near sqrt(N) = {sqrt_n}")
+            
+            # Local search near approximations
+            start = max(2, approx_x - search_radius)
+            end = min(approx_x + search_radius, sqrt_n)
+            
+            checked = 0
+            for cand_x in range(end, start - 1, -1):
+                checked += 1
+                if checked > 1000000:  # Limit checks
+                    break
                 
-            if target_int % cand_x == 0:
-                cand_y = target_int // cand_x
-                if cand_x <= cand_y:
-                    print(f"[Integer Check] Testing: {cand_x} * {cand_y}")
-                    if is_prime_miller_rabin(cand_x) and is_prime_miller_rabin(cand_y):
-                        diff = abs(cand_x - approx_x) + abs(cand_y - approx_y)
-                        if diff < min_diff:
-                            min_diff = diff
-                            best_pair = (cand_x, cand_y)
-                            print(f"[✓ Prime Factors] {cand_x} * {cand_y} = {target_int}")
-                            break
+                if target_int % cand_x == 0:
+                    cand_y = target_int // cand_x
+                    if cand_x <= cand_y:
+                        print(f"[Integer Check] Testing: {cand_x} * {cand_y}")
+                        if is_probable_prime(cand_x) and is_probable_prime(cand_y):
+                            diff = abs(cand_x - approx_x) + abs(cand_y - approx_y)
+                            if diff < min_diff:
+                                min_diff = diff
+                                best_pair = (cand_x, cand_y)
+                                print(f"[✓ Prime Factors] {cand_x} * {cand_y} = {target_int}")
+                                break
         
-        # Fallback: scan near sqrt
+        # Strategy chain (Pollard-Brent rho, ECM, SIQS, ...) under the configured time budget
         if best_pair is None:
-            print(f"[Integer Fallback] Scanning from sqrt...")
-            for i in range(sqrt_n, max(2, sqrt_n - 1000000), -1):
-                if target_int % i == 0:
-                    j = target_int // i
-                    if is_prime_miller_rabin(i) and is_prime_miller_rabin(j):
-                        best_pair = (i, j)
-                        print(f"[✓ Prime Factors] {i} * {j} = {target_int}")
-                        break
+            strategies = self.factor_strategies
+            print(f"[Integer Strategy Chain] {' -> '.join(s[0] for s in strategies)}, "
+                  f"budget {self.factor_time_budget:.0f}s...")
+            primes, leftover = factorize(target_int, strategies, self.factor_time_budget)
+            if leftover == 1 and len(primes) == 2:
+                best_pair = (primes[0], primes[1])
+                print(f"[✓ Prime Factors] {primes[0]} * {primes[1]} = {target_int}")
+            elif leftover == 1:
+                print(f"[Integer Strategy Chain] {len(primes)} prime factors - no prime pair exists")
         
-        # Small prime trial
+        # Small prime trial: one gcd with the primorial of the primes below 100000.
+        # Only the smallest prime factor can head a prime pair.
         if best_pair is None:
             print(f"[Integer Small Prime] Trying small factors...")
-            for i in range(2, min(100000, sqrt_n + 1)):
-                if target_int % i == 0:
-                    j = target_int // i
-                    if is_prime_miller_rabin(i) and is_prime_miller_rabin(j):
-                        best_pair = (i, j)
-                        print(f"[✓ Small Prime] {i} * {j} = {target_int}")
-                        break
+            i = small_factor(target_int, 100000)
+            if i is not None and i <= sqrt_n:
+                j = target_int // i
+                if is_probable_prime(j):
+                    best_pair = (i, j)
+                    print(f"[✓ Small Prime] {i} * {j} = {target_int}")
         
         if best_pair is None:
             print(f"[✗ No Prime Factors] Requires advanced factorization")
@@ -201,7 +211,6 @@ class AstroPhysicsSolver:
         log_target_scaled = self._integer_log10(target_int)
         
         # Initialize variables
-        import re
         tokens = list(set(re.findall(r'[a-zA-Z_]+', lhs_str)))
         num_vars = len(tokens) if len(tokens) > 0 else 1
         
@@ -212,20 +221,33 @@ class AstroPhysicsSolver:
         for t in tokens:
             if t not in self.variables:
                 self.create_var(t, rough_magnitude=max(2, estimated_scale))
+
+        # Closed-form log-space start for monomial LHS forms (skips annealing)
+        try:
+            lhs_fn = CompiledEquation(lhs_str)
+            seed = lhs_fn.log_space_seed(math.log10(target_int))
+        except ValueError:
+            seed = None
+        if seed is not None:
+            print(f"[Monomial] Closed-form log-space seed for {len(seed)} variables")
+            for name, log_val in zip(lhs_fn.names, seed):
+                if name in self.variables:
+                    self.variables[name].log_val = max(0, round(log_val * 10**18))
+                    self.variables[name].velocity = 0
         
         scale = 10**18
         
-        # Integer annealing loop
+        # Integer annealing loop in the log domain: the LHS is the product of the
+        # tokens, so log10(LHS) is the sum of the fixed-point logs and every step
+        # costs the same whatever the target's digit count.
+        log_val = self.state.log_val
+        token_slots = [self.state.slots[name] for name in tokens]
+        dt_scaled = scale // 100  # dt = 0.01
+        
         for iteration in range(steps):
-            vals = {n: d.val for n, d in self.variables.items()}
-            
-            # Evaluate LHS (pure integer multiplication)
-            current_lhs = 1
-            for token in tokens:
-                current_lhs *= vals[token]
-            
-            # Integer log of current
-            log_current_scaled = self._integer_log10(current_lhs)
+            log_current_scaled = 0
+            for slot in token_slots:
+                log_current_scaled += log_val[slot]
             
             # Error (scaled integer)
             error_scaled = log_current_scaled - log_target_scaled
@@ -234,43 +256,14 @@ class AstroPhysicsSolver:
             if abs(error_scaled) < (scale // 100000000):
                 break
             
-            # Sensitivity analysis (integer-based)
-            # Perturbation: 1.001 = 1 + 1/1000
-            for name in tokens:
-                domain = self.variables[name]
-                orig = domain.val
-                
-                # Perturb: val * 1.001 = val + val/1000
-                domain.val = orig + max(1, orig // 1000)
-                
-                vals_new = {n: d.val for n, d in self.variables.items()}
-                lhs_new = 1
-                for token in tokens:
-                    lhs_new *= vals_new[token]
-                
-                log_new_scaled = self._integer_log10(lhs_new)
-                domain.val = orig
-                
-                # Sensitivity (scaled integer)
-                log_delta = self._integer_log10(1001) - self._integer_log10(1000)
-                if log_delta == 0:
-                    log_delta = 1
-                    
-                sensitivity_scaled = (log_new_scaled - log_current_scaled) * scale // log_delta
-                
-                if abs(sensitivity_scaled) < scale // 1000:
-                    sensitivity_scaled = scale
-                
-                # Force (scaled integer)
-                force_scaled = -(error_scaled * scale) // sensitivity_scaled
-                force_scaled = (force_scaled * 10 * scale) // scale  # Multiply by 10
-                
-                # Update with integer arithmetic
-                dt_scaled = scale // 100  # dt = 0.01
-                domain.update_multiplicative(force_scaled, dt_scaled)
+            # d log10(LHS) / d log10(token) = 1 for every token, so the force is
+            # -error (times the gain of 10), shared by all variables
+            force_scaled = -error_scaled * 10
+            for slot in token_slots:
+                self.state.update_multiplicative(slot, force_scaled, dt_scaled)
         
-        # Get integer results
-        int_res = {n: d.val for n, d in self.variables.items()}
+        # Materialize integers only now, for the result and the factor search
+        int_res = self.state.as_dict()
         
         # Factor search
         if prefer_integers and len(tokens) == 2:
@@ -280,21 +273,57 @@ class AstroPhysicsSolver:
                 int_pair = self._find_integer_factors(target_int, approx_x, approx_y)
                 
                 if int_pair:
-                    pair_small, pair_large = min(int_pair), max(int_pair)
-                    bits_p = pair_small.bit_length()
-                    bits_q = pair_large.bit_length()
-                    total_bits = target_int.bit_length()
-                    ratio = bits_p / total_bits
-                    is_brilliant = 0.4 <= ratio <= 0.6
-                    
-                    int_res['x'] = pair_small
-                    int_res['y'] = pair_large
-                    print(f"[Integer Result] {pair_small} * {pair_large} = {target_int}")
-                    print(f"[Brilliant] Ratio: {ratio:.2f} - {'✓ VALID' if is_brilliant else '✗ UNBALANCED'}")
+                    self._apply_factor_pair(int_res, target_int, int_pair)
                 else:
-                    print(f"[Warning] No factorization - use ECM/NFS")
+                    print(f"[Warning] No factorization within {self.factor_time_budget:.0f}s (rho, Fermat/Lehman, ECM, SIQS) - raise factor_time_budget or use NFS")
         
         return int_res
+    
+    def _apply_factor_pair(self, int_res, target_int, int_pair):
+        """Factor result path: stores x <= y and reports the balance ("brilliant") check."""
+        pair_small, pair_large = min(int_pair), max(int_pair)
+        bits_p = pair_small.bit_length()
+        total_bits = target_int.bit_length()
+        ratio = bits_p / total_bits
+        is_brilliant = 0.4 <= ratio <= 0.6
+        
+        int_res['x'] = pair_small
+        int_res['y'] = pair_large
+        print(f"[Integer Result] {pair_small} * {pair_large} = {target_int}")
+        print(f"[Brilliant] Ratio: {ratio:.2f} - {'✓ VALID' if is_brilliant else '✗ UNBALANCED'}")
+    
+    def solve_many(self, equations, steps=1000000, prefer_integers=False):
+        """
+        Solves a list of equations. With prefer_integers, the x * y = N targets
+        first go through one batch GCD: any N sharing a prime with another target
+        is split there and sent straight to the factor result path, skipping the
+        annealer and the factor search. Returns one result dict per equation.
+        """
+        results = [None] * len(equations)
+        if prefer_integers:
+            targets = {}
+            for idx, equation in enumerate(equations):
+                lhs_str, rhs_str = equation.split('=')
+                try:
+                    if CompiledEquation(lhs_str).is_xy_product():
+                        targets[idx] = int(rhs_str.strip())
+                except ValueError:
+                    continue
+            pairs = shared_factor_pairs(targets.values())
+            print(f"\n[Batch GCD] {len(targets)} targets, {len(pairs)} share a prime with another target")
+            for idx, target_int in targets.items():
+                pair = pairs.get(target_int)
+                if pair is not None and is_probable_prime(pair[0]) and is_probable_prime(pair[1]):
+                    print(f"\n[Integer Physics Engine] Target: {equations[idx]}")
+                    print(f"[Batch GCD] Shared factor, annealer skipped")
+                    int_res = {}
+                    self._apply_factor_pair(int_res, target_int, pair)
+                    results[idx] = int_res
+        
+        for idx, equation in enumerate(equations):
+            if results[idx] is None:
+                results[idx] = self.solve(equation, steps, prefer_integers)
+        return results
 
 # ==========================================
 # 3. DEMONSTRATION
@@ -0,0 +1,202 @@
+import functools
+import math
+
+import numpy as np
+
+# ==========================================
+# 1. SMALL PRIMES AND PRIMORIALS
+# ==========================================
+
+@functools.lru_cache(maxsize=8)
+def _small_primes(bound):
+    is_p = np.ones(max(bound, 2), dtype=bool)
+    is_p[:2] = False
+    for p in range(2, math.isqrt(bound - 1) + 1):
+        if is_p[p]:
+            is_p[p * p::p] = False
+    primes = np.flatnonzero(is_p).astype(np.int64)
+    primes.flags.writeable = False
+    return primes
+
+
+def small_primes(bound):
+    """All primes below bound, as a read-only NumPy int64 array (Eratosthenes, cached)."""
+    return _small_primes(bound)
+
+
+def product_tree(values):
+    """
+    Levels of pairwise products, leaves first: tree[0] == values and
+    tree[-1] == [prod(values)]. Balanced products keep big multiplications cheap.
+    """
+    tree = [list(values)]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([level[i] * level[i + 1] if i + 1 < len(level) else level[i]
+                     for i in range(0, len(level), 2)])
+    return tree
+
+
+@functools.lru_cache(maxsize=8)
+def primorial(bound):
+    """Product of all primes below bound, built with a product tree (cached)."""
+    primes = small_primes(bound).tolist()
+    return product_tree(primes)[-1][0] if primes else 1
+
+# ==========================================
+# 2. BAILLIE-PSW PRIMALITY
+# ==========================================
+
+PRIMALITY_CACHE_SIZE = 65536
+_TRIAL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+
+def _jacobi(a, n):
+    """Jacobi symbol (a/n) for odd n > 0."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_probable_prime(n, a):
+    """Strong Fermat (Miller-Rabin) round to base a, for odd n > a."""
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(r - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _strong_lucas_probable_prime(n):
+    """
+    Strong Lucas test with Selfridge's parameters: D is the first of
+    5, -7, 9, -11, ... with (D/n) = -1, P = 1, Q = (1 - D) / 4. For odd,
+    non-square n.
+    """
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+
+    d, s = n + 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    # Binary ladder over d for U_k, V_k and Q^k (mod n), starting at k = 1
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            U, V = (P * U + V) % n, (D * U + P * V) % n
+            # Halve mod n (n odd): add n to odd values first
+            U = (U + n if U & 1 else U) >> 1
+            V = (V + n if V & 1 else V) >> 1
+            Qk = Qk * Q % n
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=PRIMALITY_CACHE_SIZE)
+def is_probable_prime(n):
+    """
+    Baillie-PSW: trial division by primes < 50, a strong base-2 test and a
+    strong Lucas test. Deterministic, about three Miller-Rabin rounds of work,
+    with no known counterexample (none exist below 2^64). Cached by n, since
+    factor searches re-test the same cofactors.
+    """
+    if n < 2:
+        return False
+    for p in _TRIAL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < 53 * 53:
+        return True
+    if not _strong_probable_prime(n, 2):
+        return False
+    if math.isqrt(n) ** 2 == n:
+        return False
+    return _strong_lucas_probable_prime(n)
+
+# ==========================================
+# 3. SMALL-FACTOR FILTERS
+# ==========================================
+
+def _smallest_prime_in(g, bound):
+    """Smallest prime below bound dividing g (g > 1 is a product of such primes)."""
+    for p in small_primes(bound).tolist():
+        if g % p == 0:
+            return p
+    return None
+
+
+def small_factor(n, bound):
+    """
+    Smallest prime p < bound dividing n, or None - one gcd(n, primorial(bound))
+    instead of a big-integer modulo per divisor.
+    """
+    g = math.gcd(primorial(bound), n)
+    return _smallest_prime_in(g, bound) if g > 1 else None
+
+
+def remainder_tree(x, tree):
+    """x mod every leaf of a product tree, descending from the root."""
+    rems = [x % tree[-1][0]]
+    for level in reversed(tree[:-1]):
+        rems = [rems[i // 2] % m for i, m in enumerate(level)]
+    return rems
+
+
+def small_factor_batch(values, bound):
+    """
+    small_factor for many values at once: primorial(bound) is reduced modulo
+    each value through a product/remainder tree (a few big multiplications and
+    divisions per value), followed by one small gcd each. Returns a list with
+    the smallest prime factor below bound, or None, per value.
+    """
+    values = list(values)
+    P = primorial(bound)
+    # One tree per group whose product is about the size of P: higher tree
+    # levels would only be multi-megabit products that P passes through unreduced
+    residues = []
+    group, group_bits = [], 0
+    for n in values + [None]:
+        if n is not None:
+            group.append(n)
+            group_bits += n.bit_length()
+        if group and (n is None or group_bits >= P.bit_length()):
+            residues.extend(remainder_tree(P, product_tree(group)))
+            group, group_bits = [], 0
+    out = []
+    for n, r in zip(values, residues):
+        g = math.gcd(r, n)
+        out.append(_smallest_prime_in(g, bound) if g > 1 else None)
+    return out
@@ -0,0 +1,253 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# ==========================================
+# 1. WHEEL-SKIPPED CANDIDATES
+# ==========================================
+
+WHEEL_PRIMES = (2, 3, 5, 7)
+
+
+def wheel(n):
+    """
+    (modulus, residues) of the wheel for divisors of n: candidates must be
+    coprime to each wheel prime that does not divide n (a divisor of n can
+    never contain such a prime). With n coprime to 210 this is the full mod-210
+    wheel, 48 of every 210 integers.
+    """
+    modulus = 1
+    for p in WHEEL_PRIMES:
+        if n % p:
+            modulus *= p
+    residues = [r for r in range(modulus) if math.gcd(r, modulus) == 1]
+    return modulus, residues
+
+# ==========================================
+# 2. NUMPY-BLOCKED RESIDUES
+# ==========================================
+
+# Candidates are tested in NumPy blocks of base + int64 offsets. Below 2^31:
+# for N < 2^63 directly as int64 N % cand, for larger N by Horner's rule over
+# 32-bit limbs of N (r < cand < 2^31, so r * 2^32 + limb stays below 2^63).
+# Above 2^31 a block near sqrt(N) (base^3 >= 256 N) writes N in base `base`,
+# N = a2 base^2 + a1 base + a0; since base == -k mod base + k, N is
+# a2 k^2 - a1 k + a0 mod each candidate. The small quotient of that quadratic
+# comes from float64 and the remainder is checked mod 2^64; hits are
+# confirmed on Python ints. Other blocks above 2^31 test the wheel candidates
+# one by one.
+BLOCK_LIMIT = 1 << 31
+BLOCK_SIZE = 1 << 20  # candidates per block
+
+
+def _block_offsets(lo, hi, modulus, residues):
+    """(base, offsets): wheel candidates in [lo, hi] as base + an ascending int64 array."""
+    base = lo - lo % modulus
+    steps = np.arange(0, hi - base + 1, modulus, dtype=np.int64)
+    offs = (steps[:, None] + residues[None, :]).ravel()
+    return base, offs[(offs >= lo - base) & (offs <= hi - base)]
+
+
+def _limbs(n):
+    """32-bit limbs of n, most significant first."""
+    limbs = []
+    while n:
+        limbs.append(n & 0xFFFFFFFF)
+        n >>= 32
+    return limbs[::-1]
+
+
+def _block_residues(n, cands, limbs=None):
+    """n % cands for an int64 array of candidates below 2^31."""
+    if n < 1 << 63:
+        return np.int64(n) % cands
+    r = np.zeros_like(cands)
+    for limb in (limbs or _limbs(n)):
+        r <<= 32
+        r += limb
+        r %= cands
+    return r
+
+
+def _near_root(n, base):
+    return base ** 3 >= n << 8 and base.bit_length() < 1000
+
+
+def _near_root_divisors(n, base, offs):
+    """Divisors base + k of n for an int64 array of offsets k, when _near_root(n, base)."""
+    a2, rem = divmod(n, base * base)
+    a1, a0 = divmod(rem, base)
+    kf = offs.astype(np.float64)
+    # |quotient| < 2^40, so the float64 estimate is off by at most one
+    q = np.floor(((a2 * kf - a1) * kf + a0) / (base + kf)).astype(np.int64).view(np.uint64)
+    k = offs.view(np.uint64)
+    mask = (1 << 64) - 1
+    with np.errstate(over='ignore'):
+        c = np.uint64(base & mask) + k
+        v = (np.uint64(a2 & mask) * k - np.uint64(a1 & mask)) * k + np.uint64(a0 & mask)
+        r = v - q * c
+        # The exact remainder lies in [-c, 2c): a divisor leaves -c, 0 or c
+        maybe = np.flatnonzero((r == 0) | (r == c) | (r + c == 0))
+    return [base + k for k in offs[maybe].tolist() if n % (base + k) == 0]
+
+
+def _block_divisors(n, base, offs, limbs):
+    """Divisors of n among the candidates base + offs, ascending."""
+    if not len(offs):
+        return []
+    if base + int(offs[-1]) < BLOCK_LIMIT:
+        cands = offs + base
+        return cands[_block_residues(n, cands, limbs) == 0].tolist()
+    if _near_root(n, base):
+        return _near_root_divisors(n, base, offs)
+    return [base + k for k in offs.tolist() if n % (base + k) == 0]
+
+
+def _blocks(n, lo, hi, descending):
+    """Yields (base, offsets) blocks covering [lo, hi] in scan order."""
+    modulus, residues = wheel(n)
+    residues = np.array(residues, dtype=np.int64)
+    span = BLOCK_SIZE * modulus // len(residues)
+    starts = range(lo, hi + 1, span)
+    for start in (reversed(starts) if descending else starts):
+        yield _block_offsets(start, min(start + span - 1, hi), modulus, residues)
+
+
+def _segments(lo, hi, descending):
+    """[lo, hi] split at BLOCK_LIMIT, so no block mixes the two residue paths."""
+    pieces = [(lo, min(hi, BLOCK_LIMIT - 1)), (max(lo, BLOCK_LIMIT), hi)]
+    pieces = [piece for piece in pieces if piece[0] <= piece[1]]
+    return pieces[::-1] if descending else pieces
+
+
+def divisors_in_range(n, lo, hi):
+    """All divisors of n in [lo, hi], ascending, tested in NumPy blocks."""
+    found = []
+    lo = max(lo, 1)
+    limbs = _limbs(n)
+    for seg_lo, seg_hi in _segments(lo, hi, False):
+        for base, offs in _blocks(n, seg_lo, seg_hi, False):
+            found.extend(_block_divisors(n, base, offs, limbs))
+    return found
+
+# ==========================================
+# 3. SINGLE-RANGE SCAN
+# ==========================================
+
+_first_hit = None
+
+
+def _init_worker(first_hit):
+    global _first_hit
+    _first_hit = first_hit
+
+
+def _overtaken(chunk_index):
+    return chunk_index is not None and _first_hit is not None and _first_hit.value < chunk_index
+
+
+def scan_divisor(n, lo, hi, descending=False, chunk_index=None):
+    """
+    First divisor of n in [lo, hi] in scan order (ascending or descending), or
+    None. Inside a pool worker, a chunk gives up once an earlier chunk
+    (lower chunk_index) has reported a hit.
+    """
+    lo = max(lo, 2)
+    limbs = _limbs(n)
+    for seg_lo, seg_hi in _segments(lo, hi, descending):
+        for base, offs in _blocks(n, seg_lo, seg_hi, descending):
+            hits = _block_divisors(n, base, offs, limbs)
+            if hits:
+                return hits[-1] if descending else hits[0]
+            if _overtaken(chunk_index):
+                return None
+    return None
+
+# ==========================================
+# 4. RANGE-PARTITIONED PARALLEL SCAN
+# ==========================================
+
+SCAN_CHUNK = 1 << 22  # integers per pool task (before wheel skipping)
+
+
+def _scan_chunk(n, lo, hi, descending, chunk_index):
+    hit = scan_divisor(n, lo, hi, descending, chunk_index)
+    if hit is not None:
+        with _first_hit.get_lock():
+            if chunk_index < _first_hit.value:
+                _first_hit.value = chunk_index
+    return hit
+
+
+def parallel_scan_divisor(n, lo, hi, descending=False, workers=None, chunk=SCAN_CHUNK, progress=None):
+    """
+    scan_divisor over [lo, hi] split into chunks run on a ProcessPoolExecutor
+    (in-process when only one worker is available). Returns the same divisor as
+    the sequential scan: the first hit in scan order. A hit sets a shared
+    first-hit index that stops every later chunk; earlier chunks still finish.
+    progress(cursor), if given, is called as chunks complete in scan order with
+    the bound where a resumed scan should restart (next lo, or next hi when
+    descending).
+    """
+    lo = max(lo, 2)
+    if lo > hi:
+        return None
+    workers = workers or os.cpu_count() or 1
+
+    def chunks():
+        if not descending:
+            for start in range(lo, hi + 1, chunk):
+                yield start, min(start + chunk - 1, hi)
+        else:
+            for stop in range(hi, lo - 1, -chunk):
+                yield max(stop - chunk + 1, lo), stop
+
+    def cursor_after(c_lo, c_hi):
+        return c_lo - 1 if descending else c_hi + 1
+
+    if workers == 1 or hi - lo < chunk:
+        if progress is None:
+            return scan_divisor(n, lo, hi, descending)
+        for c_lo, c_hi in chunks():
+            hit = scan_divisor(n, c_lo, c_hi, descending)
+            if hit is not None:
+                return hit
+            progress(cursor_after(c_lo, c_hi))
+        return None
+
+    first_hit = multiprocessing.get_context().Value('q', 2 ** 62)
+    results = {}
+    next_index = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(first_hit,)) as pool:
+        pending = {}
+        bounds = {}
+        todo = enumerate(chunks())
+        try:
+            while True:
+                # Keep two chunks queued per worker; none past a known hit
+                for index, (c_lo, c_hi) in todo:
+                    pending[pool.submit(_scan_chunk, n, c_lo, c_hi, descending, index)] = index
+                    bounds[index] = (c_lo, c_hi)
+                    if len(pending) >= 2 * workers or index >= first_hit.value:
+                        break
+                if not pending:
+                    return None
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+                # Results are final in chunk order
+                while next_index in results:
+                    if results[next_index] is not None:
+                        return results[next_index]
+                    if progress is not None:
+                        progress(cursor_after(*bounds.pop(next_index)))
+                    next_index += 1
+        finally:
+            with first_hit.get_lock():
+                first_hit.value = -1
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,398 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+# ==========================================
+# 1. PARAMETERS AND FACTOR BASE
+# ==========================================
+
+# (max digits of N, factor base size, sieve half-width M). Past 80 digits the
+# GF(2) step alone (factor base 40000+) would need minutes and hundreds of MB.
+SIQS_PARAMETERS = [
+    (30, 150, 32768),
+    (34, 200, 65536),
+    (38, 400, 65536),
+    (42, 600, 65536),
+    (46, 900, 65536),
+    (50, 1200, 65536),
+    (56, 2000, 3 * 65536),
+    (60, 3000, 3 * 65536),
+    (66, 5000, 3 * 65536),
+    (74, 10000, 3 * 65536),
+    (80, 20000, 3 * 65536),
+]
+
+# Primes below this are not sieved (cheap to skip, recovered by trial division)
+SMALL_PRIME_SKIP = 40
+# Single large prime bound, as a multiple of the largest factor-base prime
+LARGE_PRIME_MULTIPLIER = 64
+# Below this size rho / ECM are faster and the polynomial setup degenerates
+MIN_DIGITS = 20
+MAX_DIGITS = SIQS_PARAMETERS[-1][0]
+# A-values per worker task
+POLYS_PER_TASK = 2
+
+
+def _choose_parameters(n):
+    digits = len(str(n))
+    for max_digits, fb_size, half_width in SIQS_PARAMETERS:
+        if digits <= max_digits:
+            return fb_size, half_width
+
+
+def _sqrt_mod_prime(a, p):
+    """Tonelli-Shanks: x with x^2 = a (mod p), p an odd prime and a a residue."""
+    a %= p
+    if a == 0:
+        return 0
+    if p % 4 == 3:
+        return pow(a, (p + 1) // 4, p)
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c, t, r = i, b * b % p, t * b * b % p, r * b % p
+    return r
+
+
+def _factor_base(n, size):
+    """
+    Primes p (with 2) for which n is a quadratic residue, with sqrt(n) mod p.
+    Returns (primes, roots), or (p, None) if a prime of the base divides n.
+    """
+    primes, roots = [2], [n % 2]
+    p = 3
+    while len(primes) < size:
+        if all(p % q for q in range(3, math.isqrt(p) + 1, 2)):
+            r = n % p
+            if r == 0:
+                return p, None
+            if pow(r, (p - 1) // 2, p) == 1:
+                primes.append(p)
+                roots.append(_sqrt_mod_prime(r, p))
+        p += 2
+    return primes, roots
+
+# ==========================================
+# 2. POLYNOMIALS AND SIEVING (ONE WORKER TASK)
+# ==========================================
+
+def _choose_a(primes, target_a, rng):
+    """Picks s distinct factor-base primes whose product approximates target_a."""
+    pool = [i for i in range(len(primes) // 3, len(primes)) if primes[i] > SMALL_PRIME_SKIP]
+    mid = primes[pool[len(pool) // 2]]
+    s = max(1, min(len(pool) - 1, round(math.log(target_a) / math.log(mid))))
+    chosen = rng.sample(pool, s - 1)
+    want = target_a / math.prod(primes[i] for i in chosen)
+    chosen.append(min((i for i in pool if i not in chosen), key=lambda i: abs(primes[i] - want)))
+    return sorted(chosen)
+
+
+def _trial_divide(value, candidates, primes):
+    """Divides value by the given factor-base indices. Returns (exps, cofactor)."""
+    exps = {}
+    for j in candidates:
+        p = primes[j]
+        while value % p == 0:
+            value //= p
+            exps[j] = exps.get(j, 0) + 1
+    return exps, value
+
+
+def siqs_collect(n, primes, roots, half_width, seed, num_a, deadline=float('inf')):
+    """
+    Worker task: for num_a fresh A values, sieves all 2^(s-1) SIQS
+    polynomials g(x) = A x^2 + 2 B x + C over x in [-M, M) with NumPy slice
+    adds of log p, then trial-divides the survivors. Returns a list of
+    relations (u, exps, large_prime) with u^2 = (-1)^exps[-1] prod p^e * L (mod n).
+    """
+    rng = random.Random(seed)
+    M = half_width
+    P = np.array(primes, dtype=np.int64)
+    T = np.array(roots, dtype=np.int64)
+    logs = np.round(np.log2(P)).astype(np.int16)
+    pmax = primes[-1]
+    lp_bound = pmax * LARGE_PRIME_MULTIPLIER
+    sieve_from = next((i for i, p in enumerate(primes) if p >= SMALL_PRIME_SKIP), len(primes))
+
+    log_max = math.log2(M) + n.bit_length() / 2.0 - 0.5
+    threshold = int(log_max - math.log2(lp_bound) - 4)
+    target_a = math.isqrt(2 * n) // M
+
+    relations = []
+    for _ in range(num_a):
+        if time.time() > deadline:
+            break
+        a_idx = _choose_a(primes, target_a, rng)
+        A = math.prod(primes[i] for i in a_idx)
+        a_set = set(a_idx)
+
+        # B_l = (A/q_l) * (t_l * (A/q_l)^-1 mod q_l), so B^2 = n (mod A) for B = sum B_l
+        B_parts = []
+        for i in a_idx:
+            q = primes[i]
+            a_over_q = A // q
+            gamma = roots[i] * pow(a_over_q, -1, q) % q
+            if gamma > q // 2:
+                gamma = q - gamma
+            B_parts.append(a_over_q * gamma)
+        B = sum(B_parts)
+
+        # Per-prime A^-1, roots for the first B and Gray-code increments 2 B_l A^-1
+        ainv = np.zeros_like(P)
+        valid = np.ones(len(primes), dtype=bool)
+        for j, p in enumerate(primes):
+            if j in a_set or p == 2:
+                valid[j] = False
+                continue
+            ainv[j] = pow(A % p, -1, p)
+        Bmod = np.array([B % p for p in primes], dtype=np.int64)
+        sol1 = ainv * ((T - Bmod) % P) % P
+        sol2 = ainv * ((-T - Bmod) % P) % P
+        bainv2 = [ainv * (np.array([2 * b % p for p in primes], dtype=np.int64)) % P
+                  for b in B_parts]
+
+        for poly in range(1 << (len(B_parts) - 1)):
+            if poly > 0:
+                v = (poly & -poly).bit_length() - 1
+                if ((poly ^ (poly >> 1)) >> v) & 1:
+                    # Gray bit set: B -> B - 2 B_v, roots move by +2 B_v A^-1
+                    B -= 2 * B_parts[v]
+                    sol1 = (sol1 + bainv2[v]) % P
+                    sol2 = (sol2 + bainv2[v]) % P
+                else:
+                    B += 2 * B_parts[v]
+                    sol1 = (sol1 - bainv2[v]) % P
+                    sol2 = (sol2 - bainv2[v]) % P
+            C = (B * B - n) // A
+
+            # Log sieve over index i = x + M
+            start1 = (sol1 + M) % P
+            start2 = (sol2 + M) % P
+            sieve = np.zeros(2 * M, dtype=np.int16)
+            for j in range(sieve_from, len(primes)):
+                if not valid[j]:
+                    continue
+                p = primes[j]
+                lp = logs[j]
+                sieve[start1[j]::p] += lp
+                if start2[j] != start1[j]:
+                    sieve[start2[j]::p] += lp
+
+            for i in np.flatnonzero(sieve > threshold).tolist():
+                x = i - M
+                g = (A * x + 2 * B) * x + C
+                if g == 0:
+                    continue
+                # Factor-base primes whose roots hit this x (plus 2 and the A primes)
+                hits = np.flatnonzero(((i - start1) % P == 0) | ((i - start2) % P == 0))
+                cand = set(hits.tolist()) | a_set | {0}
+                exps, rest = _trial_divide(abs(g), sorted(cand), primes)
+                if rest != 1 and rest >= lp_bound:
+                    continue
+                for j in a_idx:
+                    exps[j] = exps.get(j, 0) + 1
+                if g < 0:
+                    exps[-1] = 1
+                relations.append((A * x + B, exps, rest))
+    return relations
+
+# ==========================================
+# 3. LINEAR ALGEBRA OVER GF(2)
+# ==========================================
+
+def _rows_as_ints(mat, nrows):
+    """Row r of a column-major bit matrix (one packed uint64 vector per column) as a Python int."""
+    shifts = np.arange(64, dtype=np.uint64)
+    out = []
+    for w in range(mat.shape[1]):
+        bits = ((mat[:, w][None, :] >> shifts[:, None]) & np.uint64(1)).astype(np.uint8)
+        packed = np.packbits(bits, axis=1, bitorder='little')
+        out.extend(int.from_bytes(row.tobytes(), 'little') for row in packed)
+    return out[:nrows]
+
+
+def _gf2_dependencies(rows, ncols, deadline=float('inf')):
+    """
+    Forward Gaussian elimination by column operations. rows[r] lists the
+    columns with odd exponent in relation r; each column is a bit-packed
+    uint64 vector over the relations. Columns go sparsest first (the large
+    primes), so early pivots touch few columns, and a pivot row is cleared
+    from the later columns only, in one vectorized XOR. A row that never
+    becomes a pivot is back-substituted through the pivot rows. Returns
+    subsets of row indices whose vectors sum to zero, or [] once
+    time.time() passes deadline.
+    """
+    nrows = len(rows)
+    r_idx = np.repeat(np.arange(nrows, dtype=np.int64), [len(cols) for cols in rows])
+    c_idx = np.fromiter((c for cols in rows for c in cols), dtype=np.int64, count=len(r_idx))
+    weight = np.bincount(c_idx, minlength=ncols)
+    order = np.argsort(weight, kind='stable')
+    order = order[weight[order] > 0]
+    position = np.zeros(ncols, dtype=np.int64)
+    position[order] = np.arange(len(order))
+    mat = np.zeros((len(order), (nrows + 63) // 64), dtype=np.uint64)
+    np.bitwise_xor.at(mat, (position[c_idx], r_idx >> 6),
+                      np.left_shift(np.uint64(1), (r_idx & 63).astype(np.uint64)))
+
+    pivots = []  # (column position, pivot row)
+    for t in range(len(order)):
+        if time.time() > deadline:
+            return []
+        col = mat[t]
+        words = np.flatnonzero(col)
+        if not words.size:
+            continue
+        w = int(words[0])
+        low = int(col[w]) & -int(col[w])
+        pivots.append((t, w * 64 + low.bit_length() - 1))
+        later = mat[t + 1:]
+        targets = np.flatnonzero(later[:, w] & np.uint64(low))
+        if targets.size:
+            later[targets] ^= col
+
+    # Pivot row of column t is 0 after t and 1 at t, so walking the pivots
+    # backwards clears a free row one column at a time
+    reduced = _rows_as_ints(mat, nrows)
+    is_pivot = np.zeros(nrows, dtype=bool)
+    is_pivot[[row for _, row in pivots]] = True
+    deps = []
+    for i in np.flatnonzero(~is_pivot).tolist():
+        if time.time() > deadline:
+            break
+        v, members = reduced[i], [i]
+        for t, row in reversed(pivots):
+            if v >> t & 1:
+                v ^= reduced[row]
+                members.append(row)
+        deps.append(members)
+    return deps
+
+# ==========================================
+# 4. DRIVER
+# ==========================================
+
+def _combine_partials(partials):
+    """Pairs partial relations sharing a large prime L into full relations."""
+    combined = []
+    by_prime = {}
+    for u, exps, lp in partials:
+        by_prime.setdefault(lp, []).append((u, exps))
+    for lp, group in by_prime.items():
+        u0, e0 = group[0]
+        for u1, e1 in group[1:]:
+            exps = dict(e0)
+            for j, e in e1.items():
+                exps[j] = exps.get(j, 0) + e
+            combined.append((u0 * u1, exps, lp))
+    return combined
+
+
+def _try_dependencies(n, relations, primes, deadline=float('inf')):
+    rows = [[(j + 1) if j >= 0 else 0 for j, e in exps.items() if e % 2] for _, exps, _ in relations]
+    for members in _gf2_dependencies(rows, len(primes) + 1, deadline):
+        x, lp_product, total = 1, 1, {}
+        for r in members:
+            u, exps, lp = relations[r]
+            x = x * u % n
+            lp_product = lp_product * lp % n
+            for j, e in exps.items():
+                total[j] = total.get(j, 0) + e
+        y = lp_product
+        for j, e in total.items():
+            if j >= 0:
+                y = y * pow(primes[j], e // 2, n) % n
+        g = math.gcd(x - y, n)
+        if 1 < g < n:
+            return g
+    return None
+
+
+def siqs(n, deadline=None, workers=None, seed=None):
+    """
+    Self-initializing quadratic sieve with single large primes. Relation
+    collection runs as independent per-seed tasks on a ProcessPoolExecutor
+    (in-process with one worker); dependencies come from bit-packed GF(2)
+    elimination, which also stops at the deadline. deadline is a
+    time.monotonic() value. Returns a non-trivial factor of n, or None
+    (also for n outside MIN_DIGITS..MAX_DIGITS).
+    """
+    if n % 2 == 0:
+        return 2
+    root = math.isqrt(n)
+    if root * root == n:
+        return root
+    if not MIN_DIGITS <= len(str(n)) <= MAX_DIGITS:
+        return None
+    remaining = float('inf') if deadline is None else deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    wall_deadline = time.time() + remaining
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(n if seed is None else seed)
+
+    fb_size, half_width = _choose_parameters(n)
+    primes, roots = _factor_base(n, fb_size)
+    if roots is None:
+        return primes
+    needed = len(primes) + 20
+
+    full, partials = [], []
+
+    def absorb(batch):
+        for rel in batch:
+            (full if rel[2] == 1 else partials).append(rel)
+
+    def enough():
+        return len(full) + len(_combine_partials(partials)) >= needed
+
+    def attempt():
+        relations = full + _combine_partials(partials)
+        return _try_dependencies(n, relations, primes, wall_deadline)
+
+    def task_args():
+        return (n, primes, roots, half_width, rng.getrandbits(64), POLYS_PER_TASK, wall_deadline)
+
+    if workers == 1:
+        while time.time() <= wall_deadline:
+            absorb(siqs_collect(*task_args()))
+            if enough():
+                factor = attempt()
+                if factor:
+                    return factor
+                needed += 10
+        return None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(siqs_collect, *task_args()) for _ in range(2 * workers)}
+        try:
+            while pending and time.time() <= wall_deadline:
+                done, pending = wait(pending, timeout=max(0.0, wall_deadline - time.time()),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    absorb(future.result())
+                if enough():
+                    factor = attempt()
+                    if factor:
+                        return factor
+                    needed += 10
+                while len(pending) < 2 * workers:
+                    pending.add(pool.submit(siqs_collect, *task_args()))
+        finally:
+            for future in pending:
+                future.cancel()
+    return None
@@ -0,0 +1,193 @@
+import math
+
+import numpy as np
+
+# ==========================================
+# STRUCT-OF-ARRAYS VARIABLE STORE
+# ==========================================
+
+class AstroState:
+    """
+    Values, velocities and names of solver variables, stored by slot index in
+    contiguous float64 arrays. AstroDomain objects are thin views onto a slot.
+    """
+
+    def __init__(self, capacity=8):
+        self.names = []
+        self.slots = {}
+        self.val = np.zeros(capacity)
+        self.velocity = np.zeros(capacity)
+        self._scratch = np.zeros(capacity)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.val))
+        for attr in ('val', 'velocity', '_scratch'):
+            old = getattr(self, attr)
+            new = np.zeros(capacity)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+
+    def add(self, name, initial_scale):
+        """Returns the slot for name, (re)initializing its value and velocity."""
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = len(self.names)
+            if slot >= len(self.val):
+                self._grow(slot + 1)
+            self.names.append(name)
+            self.slots[name] = slot
+        self.val[slot] = initial_scale
+        self.velocity[slot] = 0.0
+        return slot
+
+    def block(self, names):
+        """
+        Index for a group of variables: a slice (zero-copy views) when their
+        slots are contiguous and ascending, else an integer index array.
+        """
+        slots = [self.slots[name] for name in names]
+        if slots and slots == list(range(slots[0], slots[0] + len(slots))):
+            return slice(slots[0], slots[0] + len(slots))
+        return np.array(slots, dtype=np.intp)
+
+    def as_dict(self):
+        return {name: float(self.val[slot]) for name, slot in self.slots.items()}
+
+    def snapshot(self):
+        """Plain-list copy of names, values and velocities (JSON-serializable)."""
+        size = len(self.names)
+        return {'names': list(self.names), 'val': self.val[:size].tolist(),
+                'velocity': self.velocity[:size].tolist()}
+
+    def restore(self, snapshot):
+        """Re-creates the variables of a snapshot() with their values and velocities."""
+        for name, val, velocity in zip(snapshot['names'], snapshot['val'], snapshot['velocity']):
+            slot = self.add(name, val)
+            self.velocity[slot] = velocity
+
+    def update_multiplicative(self, index, factor, dt):
+        """
+        Damped multiplicative update val *= (1 + clip(velocity * dt, +-0.1)) for
+        one slot (scalar path) or a block of slots (in place, vectorized).
+        """
+        if isinstance(index, (int, np.integer)):
+            velocity = self.velocity[index] * 0.8 + factor * 0.2
+            self.velocity[index] = velocity
+            step_change = max(-0.1, min(0.1, velocity * dt))
+            val = self.val[index] * (1.0 + step_change)
+            self.val[index] = val if val >= 1e-100 else 1e-100
+            return
+
+        if isinstance(index, slice):
+            velocity = self.velocity[index]
+            val = self.val[index]
+            scratch = self._scratch[:len(val)]
+            np.multiply(velocity, 0.8, out=velocity)
+            np.multiply(factor, 0.2, out=scratch)
+            velocity += scratch
+            np.multiply(velocity, dt, out=scratch)
+            np.minimum(scratch, 0.1, out=scratch)
+            np.maximum(scratch, -0.1, out=scratch)
+            scratch += 1.0
+            val *= scratch
+            np.maximum(val, 1e-100, out=val)
+            return
+
+        velocity = self.velocity[index] * 0.8 + np.asarray(factor) * 0.2
+        self.velocity[index] = velocity
+        self.val[index] = np.maximum(
+            self.val[index] * (1.0 + np.clip(velocity * dt, -0.1, 0.1)), 1e-100
+        )
+
+
+# ==========================================
+# FIXED-POINT LOG10 HELPERS
+# ==========================================
+
+_LOG10_2 = math.log10(2)
+# log10(e) scaled by 10^18, for turning a relative step into a log10 step
+_LOG10_E_SCALED = 434294481903251828
+
+
+def fixed_log10(n, scale=10**18):
+    """log10 of a positive integer as a fixed-point int (scaled by `scale`), from its top 64 bits."""
+    if n <= 0:
+        return -100 * scale
+    shift = max(0, n.bit_length() - 64)
+    return round((math.log10(n >> shift) + shift * _LOG10_2) * scale)
+
+
+def fixed_pow10(log_scaled, scale=10**18):
+    """Materializes 10^(log_scaled / scale) as an integer (15 significant digits, exact power of ten)."""
+    exponent, frac = divmod(log_scaled, scale)
+    if exponent < 15:
+        return max(1, round(10 ** (log_scaled / scale)))
+    mantissa = int(10 ** (15 + frac / scale))
+    return mantissa * 10 ** (exponent - 15)
+
+
+class IntegerAstroState:
+    """
+    Integer-engine counterpart of AstroState. Each variable is carried as a
+    fixed-point log10 (scaled by `scale`) with a fixed-point velocity, so an
+    update costs the same for a 10-digit or a 700-bit value; big integers are
+    only materialized on read (val / as_dict).
+    """
+
+    def __init__(self, scale=10**18):
+        self.names = []
+        self.slots = {}
+        self.log_val = []
+        self.velocity = []
+        self.scale = scale
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, initial_scale):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = len(self.names)
+            self.names.append(name)
+            self.slots[name] = slot
+            self.log_val.append(0)
+            self.velocity.append(0)
+        self.set_value(slot, initial_scale)
+        self.velocity[slot] = 0
+        return slot
+
+    def value(self, slot):
+        return fixed_pow10(self.log_val[slot], self.scale)
+
+    def set_value(self, slot, n):
+        self.log_val[slot] = fixed_log10(max(1, n), self.scale)
+
+    def as_dict(self):
+        return {name: self.value(slot) for name, slot in self.slots.items()}
+
+    def update_multiplicative(self, slot, force_int, dt_scaled):
+        """
+        Multiplicative update val *= (1 + velocity * dt), applied additively to
+        the fixed-point log: log10(val) += velocity * dt * log10(e).
+        """
+        scale = self.scale
+        # Damping: velocity = 0.8*velocity + 0.2*force (scaled by 10^18)
+        velocity = (self.velocity[slot] * 8 + force_int * 2) // 10
+
+        # Cap velocity: -0.1 to +0.1 (scaled: -10^17 to +10^17)
+        max_velocity = scale // 10
+        if velocity > max_velocity:
+            velocity = max_velocity
+        elif velocity < -max_velocity:
+            velocity = -max_velocity
+        self.velocity[slot] = velocity
+
+        # Relative step (scaled), then its first-order log10 increment; |step| <= 0.1 * dt
+        step_change = (velocity * dt_scaled) // scale
+        log_val = self.log_val[slot] + step_change * _LOG10_E_SCALED // 10**18
+
+        # Safety floor: val >= 1
+        self.log_val[slot] = log_val if log_val >= 0 else 0
@@ -0,0 +1,339 @@
+import math
+
+import numpy as np
+
+# ==========================================
+# 1. BITSET REACHABILITY
+# ==========================================
+
+# The reachable sums are one arbitrary-precision integer: bit s is set when
+# some subset of the items seen so far sums to s. Adding an item is a single
+# shift-or, reach |= reach << num, masked to the target (word-level work
+# inside CPython instead of one interpreter step per sum).
+
+def _add_item(reach, num, target, mask):
+    if 0 < num <= target:
+        reach |= (reach << num) & mask
+    return reach
+
+
+def reachable_sums(numbers, target, reach=1):
+    """Bitset of the subset sums of numbers that are <= target, starting from reach (default {0})."""
+    mask = (1 << (target + 1)) - 1
+    for num in numbers:
+        reach = _add_item(reach, num, target, mask)
+    return reach
+
+# The checkpointed solver keeps the same bitset as a packed uint64 array
+# (bit s is bit s & 63 of word s >> 6) and shifts it in place with NumPy
+# ufuncs into two scratch arrays: no new objects per item and about 3x the
+# big-integer throughput at multi-million-bit targets. Bits past the target
+# in the top word are never read.
+
+def _packed_set(target):
+    """{0} as a packed bitset for sums up to target."""
+    words = np.zeros((target >> 6) + 1, dtype=np.uint64)
+    words[0] = 1
+    return words
+
+
+def _packed_add_item(words, num, live, scratch):
+    """
+    words |= words << num in place, for words[:live] (the words that can
+    hold a set bit once num is added). scratch is two arrays of len(words).
+    """
+    q, s = num >> 6, num & 63
+    span = live - q
+    if span <= 0:
+        return
+    shifted, carry = scratch[0][:span], scratch[1][:span - 1]
+    np.left_shift(words[:span], np.uint64(s), out=shifted)
+    if s and span > 1:
+        np.right_shift(words[:span - 1], np.uint64(64 - s), out=carry)
+        shifted[1:] |= carry
+    words[q:live] |= shifted
+
+
+def _packed_has(words, s):
+    return int(words[s >> 6]) >> (s & 63) & 1
+
+# ==========================================
+# 2. EXACT SUBSET SUM WITH SPARSE CHECKPOINTS
+# ==========================================
+
+def subset_sum_bitset(numbers, target, progress=None):
+    """
+    Exact subset sum on packed reachability bitsets. The forward pass keeps
+    the bitset only every ~sqrt(n) items; the backward walk recomputes one
+    block of layers at a time from those checkpoints. Returns the same
+    subset as the classic prev[] table (for each sum, the earliest item that
+    reaches it), largest item index first, or None when target is
+    unreachable. progress(done, total) is called after every item of the
+    forward pass.
+    """
+    if target == 0:
+        return []
+    n = len(numbers)
+    if n == 0 or target < 0:
+        return None
+    stride = max(1, math.isqrt(n))
+    nwords = (target >> 6) + 1
+    scratch = (np.empty(nwords, dtype=np.uint64), np.empty(nwords, dtype=np.uint64))
+    # live[i] = words that can be non-zero after items [0, i)
+    live = [1]
+    for num in numbers:
+        grown = live[-1] + ((num + 63) >> 6) if 0 < num <= target else live[-1]
+        live.append(min(grown, nwords))
+
+    # checkpoints[b] = reachable sums before item b * stride. All bitsets live
+    # in two preallocated blocks, so no item allocates
+    checkpoints = np.empty(((n - 1) // stride + 1, nwords), dtype=np.uint64)
+    reach = _packed_set(target)
+    for i, num in enumerate(numbers):
+        if i % stride == 0:
+            checkpoints[i // stride] = reach
+        if 0 < num <= target:
+            _packed_add_item(reach, num, live[i + 1], scratch)
+        if progress is not None:
+            progress(i + 1, n)
+    if not _packed_has(reach, target):
+        return None
+    del reach
+
+    # s stays reachable with the items before the current one; an item is
+    # taken exactly when s was not reachable without it. A shift only moves
+    # bits up, so a block's layers are rebuilt over the words up to s alone.
+    layers = np.empty((stride, nwords), dtype=np.uint64)
+    subset = []
+    s = target
+    for b in reversed(range(len(checkpoints))):
+        if s == 0:
+            break
+        lo, hi = b * stride, min((b + 1) * stride, n)
+        width = (s >> 6) + 1
+        layers[0, :width] = checkpoints[b, :width]
+        for k in range(1, hi - lo):
+            layers[k, :width] = layers[k - 1, :width]
+            num = numbers[lo + k - 1]
+            if 0 < num <= s:
+                _packed_add_item(layers[k], num, min(live[lo + k], width), scratch)
+        for k in reversed(range(hi - lo)):
+            if not _packed_has(layers[k], s):
+                subset.append(numbers[lo + k])
+                s -= numbers[lo + k]
+    return subset
+
+# ==========================================
+# 3. HIRSCHBERG-STYLE SPLITTING (O(target / 8) BYTES)
+# ==========================================
+
+def subset_sum_hirschberg(numbers, target, progress=None):
+    """
+    Exact subset sum in a constant number of bitsets: the items are halved,
+    a sum a reachable on the left with target - a reachable on the right is
+    picked (the right half runs downward from target with reach >> num), and
+    both halves are solved the same way. O(n log n) shift-ors, no layers kept.
+    Returns a subset (later items first) or None. progress(done, total)
+    follows the initial reachability pass.
+    """
+    if target == 0:
+        return []
+    n = len(numbers)
+    if n == 0 or target < 0:
+        return None
+    mask = (1 << (target + 1)) - 1
+    reach = 1
+    for i, num in enumerate(numbers):
+        reach = _add_item(reach, num, target, mask)
+        if progress is not None:
+            progress(i + 1, n)
+    if not reach >> target & 1:
+        return None
+    del reach
+
+    # Every (lo, hi, s) on the stack has s reachable with numbers[lo:hi]
+    subset = []
+    stack = [(0, n, target)]
+    while stack:
+        lo, hi, s = stack.pop()
+        if s == 0:
+            continue
+        if hi - lo == 1:
+            subset.append(numbers[lo])
+            continue
+        mid = (lo + hi) // 2
+        left = reachable_sums(numbers[lo:mid], s)
+        # Bit s - b of right is set for every subset sum b <= s of the right half
+        right = 1 << s
+        for num in numbers[mid:hi]:
+            if 0 < num <= s:
+                right |= right >> num
+        both = left & right
+        del left, right
+        a = (both & -both).bit_length() - 1
+        del both
+        stack.append((lo, mid, a))
+        stack.append((mid, hi, s - a))
+    return subset
+
+# ==========================================
+# 4. PLANNING
+# ==========================================
+
+SUBSET_SUM_METHODS = {
+    'checkpoints': subset_sum_bitset,
+    'hirschberg': subset_sum_hirschberg,
+}
+
+# Checkpointed layers are faster; past this many bytes the solvers switch to Hirschberg splitting
+SUBSET_MEMORY_BUDGET = 1 << 30
+
+
+def dp_footprint(n, target, method):
+    """
+    Estimated peak bytes of a subset-sum method: live bitsets of target + 1
+    bits each, plus the two temporaries of a masked shift-or.
+    """
+    bitset = (target + 8) // 8
+    if method == 'hirschberg':
+        return 4 * bitset
+    stride = max(1, math.isqrt(n))
+    return (n // stride + 1 + stride + 2) * bitset
+
+
+def plan_subset_sum(n, target, memory_budget=SUBSET_MEMORY_BUDGET):
+    """(method, estimated peak bytes): checkpoints when they fit in memory_budget, else hirschberg."""
+    method = 'checkpoints'
+    if dp_footprint(n, target, method) > memory_budget:
+        method = 'hirschberg'
+    return method, dp_footprint(n, target, method)
+
+# ==========================================
+# 5. MEET IN THE MIDDLE (SMALL SETS, ANY TARGET)
+# ==========================================
+
+# Half-sums live in NumPy arrays: int64 while every partial sum fits, Python
+# ints (object arrays) beyond that. Index i of a subset-sum array is the sum
+# of the items whose bits are set in i.
+MITM_MAX_ITEMS = 40  # Horowitz-Sahni: two sorted arrays of 2^(n/2) sums
+SCHROEPPEL_SHAMIR_MAX_ITEMS = 64  # 2^(n/4) memory, 2^(n/2) work
+
+
+def _sum_dtype(numbers, target):
+    bound = max(sum(abs(num) for num in numbers), abs(target))
+    return np.int64 if bound < 1 << 62 else object
+
+
+def _subset_sums(numbers, dtype):
+    sums = np.zeros(1, dtype=dtype)
+    for num in numbers:
+        sums = np.concatenate((sums, sums + num))
+    return sums
+
+
+def _pick(numbers, mask):
+    return [num for j, num in enumerate(numbers) if mask >> j & 1]
+
+
+def _match(sums, sorted_sums, order, target):
+    """(i, j) with sums[i] + sorted_sums[j] == target, j mapped through order; or None."""
+    need = target - sums
+    idx = np.minimum(np.searchsorted(sorted_sums, need), len(sorted_sums) - 1)
+    hits = np.flatnonzero(sorted_sums[idx] == need)
+    if not len(hits):
+        return None
+    i = int(hits[0])
+    return i, int(order[idx[i]])
+
+
+def subset_sum_horowitz_sahni(numbers, target):
+    """
+    Horowitz-Sahni meet in the middle: all subset sums of each half, the right
+    half sorted, and one searchsorted for target - left. O(2^(n/2)) time and
+    memory, independent of the target's size. Returns a subset or None.
+    """
+    if target == 0:
+        return []
+    numbers = list(numbers)
+    half = len(numbers) // 2
+    dtype = _sum_dtype(numbers, target)
+    left = _subset_sums(numbers[:half], dtype)
+    right = _subset_sums(numbers[half:], dtype)
+    order = np.argsort(right, kind='stable')
+    hit = _match(left, right[order], order, target)
+    if hit is None:
+        return None
+    return _pick(numbers[:half], hit[0]) + _pick(numbers[half:], hit[1])
+
+
+def _pairs_with_residue(a_sums, a_res, b_sums, b_res_sorted, b_order, r, modulus):
+    """All (a + b, i, j) with (a_sums[i] + b_sums[j]) % modulus == r, vectorized."""
+    need = (r - a_res) % modulus
+    lo = np.searchsorted(b_res_sorted, need, 'left')
+    counts = np.searchsorted(b_res_sorted, need, 'right') - lo
+    total = int(counts.sum())
+    i = np.repeat(np.arange(len(a_sums)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    j = b_order[np.repeat(lo, counts) + offsets]
+    return a_sums[i] + b_sums[j], i, j
+
+
+def subset_sum_schroeppel_shamir(numbers, target):
+    """
+    Schroeppel-Shamir in its residue-class form: the items are split into
+    quarters A, B | C, D, and for each residue r mod M (M ~ 2^(n/4)) the
+    left sums a + b = r (mod M) are matched against the right sums
+    c + d = target - r (mod M) by searchsorted. Every solution is found under
+    the residue of its left part. O(2^(n/2)) work, O(2^(n/4)) memory per
+    residue. Returns a subset or None.
+    """
+    if target == 0:
+        return []
+    numbers = list(numbers)
+    n = len(numbers)
+    if n < 8:
+        return subset_sum_horowitz_sahni(numbers, target)
+    cuts = [0, n // 4, n // 2, n // 2 + (n - n // 2) // 2, n]
+    quarters = [numbers[cuts[k]:cuts[k + 1]] for k in range(4)]
+    dtype = _sum_dtype(numbers, target)
+    sums = [_subset_sums(quarter, dtype) for quarter in quarters]
+    modulus = len(sums[1])
+    residues = [(s % modulus).astype(np.int64) for s in sums]
+    # B and D sorted by residue for the per-residue pair lookups
+    b_order = np.argsort(residues[1], kind='stable')
+    d_order = np.argsort(residues[3], kind='stable')
+    b_res, d_res = residues[1][b_order], residues[3][d_order]
+
+    for r in range(modulus):
+        left, ai, bi = _pairs_with_residue(sums[0], residues[0], sums[1], b_res, b_order, r, modulus)
+        if not len(left):
+            continue
+        right, ci, di = _pairs_with_residue(sums[2], residues[2], sums[3], d_res, d_order,
+                                            (target - r) % modulus, modulus)
+        if not len(right):
+            continue
+        order = np.argsort(right, kind='stable')
+        hit = _match(left, right[order], order, target)
+        if hit is not None:
+            i, j = hit
+            masks = (int(ai[i]), int(bi[i]), int(ci[j]), int(di[j]))
+            return [num for quarter, mask in zip(quarters, masks) for num in _pick(quarter, mask)]
+    return None
+
+
+MEET_IN_THE_MIDDLE_METHODS = {
+    'horowitz_sahni': subset_sum_horowitz_sahni,
+    'schroeppel_shamir': subset_sum_schroeppel_shamir,
+}
+
+
+def choose_subset_method(n, target, dp_max_target=10000000000):
+    """
+    Exact method with the least estimated work: 'dp' (n * target / 64 word
+    operations, target <= dp_max_target), 'horowitz_sahni' or
+    'schroeppel_shamir' (~ n * 2^(n/2)), or None when neither is feasible.
+    """
+    dp_work = n * (target + 1) / 64 if 0 <= target <= dp_max_target else math.inf
+    if n > SCHROEPPEL_SHAMIR_MAX_ITEMS or dp_work <= max(n, 1) * 2 ** (n / 2):
+        return 'dp' if dp_work < math.inf else None
+    return 'horowitz_sahni' if n <= MITM_MAX_ITEMS else 'schroeppel_shamir'
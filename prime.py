@@ -2,6 +2,13 @@ import numpy as np
 import math
 import warnings
 import sys
+import time
+
+from astro_equation import CompiledEquation, anneal_batch
+from astro_factor import (DEFAULT_STRATEGIES, WORD_LIMIT, divisors, factor_word_primes, fermat_lehman,
+                          find_factor, shared_factor_pairs)
+from astro_scan import divisors_in_range, wheel
+from astro_state import AstroState
 
 sys.setrecursionlimit(2000)
 warnings.filterwarnings("ignore")
@@ -11,34 +18,40 @@ warnings.filterwarnings("ignore")
 # ==========================================
 
 class AstroDomain:
-    def __init__(self, name, initial_scale=10.0):
-        self.name = name
+    """Thin view onto one slot of an AstroState (values live in the state arrays)."""
+    __slots__ = ('state', 'slot')
+
+    def __init__(self, name, initial_scale=10.0, state=None):
+        self.state = state if state is not None else AstroState(capacity=1)
         # Initialize to scale for better convergence on balanced factors
-        self.val = initial_scale
-        self.velocity = 0.0
+        self.slot = self.state.add(name, initial_scale)
+
+    @property
+    def name(self):
+        return self.state.names[self.slot]
+
+    @property
+    def val(self):
+        return float(self.state.val[self.slot])
+
+    @val.setter
+    def val(self, value):
+        self.state.val[self.slot] = value
+
+    @property
+    def velocity(self):
+        return float(self.state.velocity[self.slot])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.state.velocity[self.slot] = value
         
     def update_multiplicative(self, factor, dt):
         """
         Updates value by a multiplicative factor (safe for huge numbers).
-        val_new = val_old * (1 + speed * dt)
+        val_new = val_old * (1 + speed * dt), damped velocity, step capped at 10%.
         """
-        # Damping on the factor itself to prevent oscillation
-        # We treat 'velocity' here as 'rate of exponential growth'
-        target_velocity = factor
-        self.velocity = (self.velocity * 0.8) + (target_velocity * 0.2)
-        
-        # Cap the step size to 10% growth per tick to ensure stability
-        step_change = np.clip(self.velocity * dt, -0.1, 0.1)
-        
-        # Apply update: val = val * (1 + change)
-        try:
-            self.val *= (1.0 + step_change)
-        except OverflowError:
-            self.val = float('inf')
-
-        # Safety floor
-        if self.val < 1e-100:
-            self.val = 1e-100
+        self.state.update_multiplicative(self.slot, factor, dt)
 
 # ==========================================
 # 2. LOG-SCALE MATH ENGINE
@@ -46,10 +59,38 @@ class AstroDomain:
 
 class AstroPhysicsSolver:
     def __init__(self):
+        self.state = AstroState()
         self.variables = {}
+        # Pluggable factor-search stages and their shared wall-clock budget (seconds)
+        self.factor_strategies = list(DEFAULT_STRATEGIES)
+        self.factor_time_budget = 30.0
+        # First integer stage: Fermat/Lehman on the annealer's hint, capped in steps and seconds
+        self.fermat_max_steps = 10000000
+        self.near_square_seconds = 2.0
         
     def create_var(self, name, rough_magnitude):
-        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude)
+        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude, state=self.state)
+    
+    def _near_square_pair(self, target_int, approx_x):
+        """Fermat/Lehman search centred on the hint approx_x. Returns (x, y) with x <= y, or None."""
+        deadline = time.monotonic() + min(self.near_square_seconds, self.factor_time_budget)
+        factor = fermat_lehman(target_int, deadline, self.fermat_max_steps, hint=approx_x)
+        if factor is None:
+            return None
+        pair = (min(factor, target_int // factor), max(factor, target_int // factor))
+        print(f"[Near-Square] Fermat/Lehman found {pair[0]} * {pair[1]}")
+        return pair
+    
+    def _word_factor_pair(self, target_int, approx_x, approx_y):
+        """
+        N < 2^64: full factorization through the word-sized fast path, then the
+        divisor pair closest to the approximate solution. (1, N) for prime N.
+        """
+        primes = factor_word_primes(target_int)
+        pairs = [(d, target_int // d) for d in divisors(primes) if d * d <= target_int]
+        best = min(pairs, key=lambda pair: abs(pair[0] - approx_x) + abs(pair[1] - approx_y))
+        print(f"[Word Fast Path] {target_int} = {' * '.join(map(str, primes))} -> {best[0]} * {best[1]}")
+        return best
     
     def _find_integer_factors(self, target_int, approx_x, approx_y, search_radius=100000000):
         """
@@ -64,48 +105,42 @@ class AstroPhysicsSolver:
         if approx_x > approx_y:
             approx_x, approx_y = approx_y, approx_x
         
-        best_pair = None
+        # Word-sized targets factor completely in milliseconds - no scans needed
+        if target_int < WORD_LIMIT:
+            return self._word_factor_pair(target_int, approx_x, approx_y)
+        
         min_diff = float('inf')
         
         sqrt_n = math.isqrt(target_int)  # exact integer sqrt floor [web:65]
         
-        # Enhanced Local search: Larger radius for bigger numbers, but cap checks for feasibility
-        max_checks = 10000000  # Feasible limit: 10M checks
-        start = max(1, int(approx_x) - search_radius)
-        end = min(int(approx_x) + search_radius, sqrt_n)
+        # Near-square search first: Fermat/Lehman from the annealer's balanced hint replaces
+        # the linear scan as the opening stage, under its own step and time cap.
+        best_pair = self._near_square_pair(target_int, approx_x)
         
-        # Prioritize downward from approx_x (towards balance)
-        direction = -1 if approx_x > sqrt_n / 2 else 1
-        step_range = range(end, start - 1, direction)
-        checked = 0
-        for cand_x in step_range:
-            if checked > max_checks:
-                break
-            if cand_x <= 0:
-                continue
-            if target_int % cand_x == 0:
+        # Enhanced Local search: Larger radius for bigger numbers, but cap checks for feasibility.
+        # Candidates come off a mod-210 wheel and are tested in NumPy blocks (the window
+        # sits near sqrt(N)); the cap now counts wheel candidates, not integers.
+        if best_pair is None:
+            max_checks = 10000000  # Feasible limit: 10M checks
+            modulus, residues = wheel(target_int)
+            end = min(int(approx_x) + search_radius, sqrt_n)
+            # Prioritize downward from approx_x (towards balance)
+            start = max(1, int(approx_x) - search_radius, end - max_checks * modulus // len(residues))
+            
+            for cand_x in divisors_in_range(target_int, start, end):
                 cand_y = target_int // cand_x
                 if cand_x <= cand_y:
                     diff = abs(cand_x - approx_x) + abs(cand_y - approx_y)
                     if diff < min_diff:
                         min_diff = diff
                         best_pair = (cand_x, cand_y)
-            checked += 1
         
-        # Enhanced Fallback: Scan near sqrt(N) for balance
+        # Strategy chain (Pollard-Brent rho, ECM, ...) under the configured time budget
         if best_pair is None and sqrt_n > 1:
-            fallback_start = sqrt_n
-            fallback_end = max(1, sqrt_n - max_checks)
-            fallback_checked = 0
-            for i in range(fallback_start, fallback_end - 1, -1):
-                if fallback_checked > max_checks:
-                    break
-                if target_int % i == 0:
-                    j = target_int // i
-                    if i <= j:
-                        best_pair = (i, j)
-                        break
-                fallback_checked += 1
+            factor, method = find_factor(target_int, self.factor_strategies, self.factor_time_budget)
+            if factor is not None:
+                best_pair = (min(factor, target_int // factor), max(factor, target_int // factor))
+                print(f"[Strategy Chain] {method} found {best_pair[0]} * {best_pair[1]}")
         
         # Ultimate Fallback: avoid trivial 1*N for large N; use approx sqrt if no factors found
         if best_pair is None:
@@ -119,12 +154,8 @@ class AstroPhysicsSolver:
         
         return best_pair
     
-    def solve(self, equation, steps=10000000, prefer_integers=False):
-        print(f"\n[Physics Engine] Target Equation: {equation}")
-        
-        lhs_str, rhs_str = equation.split('=')
-        
-        # 1. Parse Target Safely - Handle large integers exactly
+    def _parse_target(self, rhs_str):
+        """Parses the RHS, keeping an exact integer when possible. Returns (target_int, target_val)."""
         target_int = None
         target_val = None
         try:
@@ -147,6 +178,38 @@ class AstroPhysicsSolver:
                 target_val = float('inf')
                 target_int = None
             print("Warning: Target parsing issues, using approximate.")
+        return target_int, target_val
+    
+    def _apply_integer_mode(self, float_res, target_int, tokens):
+        """Replaces the float x, y solution with exact integer factors of target_int."""
+        if 'x' in tokens and 'y' in tokens:
+            approx_x = float_res['x']
+            approx_y = float_res['y']
+            
+            # Try to find exact integer factors near the float solution
+            int_pair = self._find_integer_factors(target_int, approx_x, approx_y)
+            if int_pair:
+                a, b = int_pair
+                # Order them so a <= b
+                if a > b:
+                    a, b = b, a
+                float_res['x'] = a
+                float_res['y'] = b
+                print(f"[Integer Mode] Using integer pair: {a} * {b} = {a*b}")
+            else:
+                # As a last resort, use isqrt-based balanced pair
+                s = math.isqrt(target_int)  # exact floor sqrt [web:65]
+                float_res['x'] = s
+                float_res['y'] = target_int // s
+                print(f"[Approx Integer Mode] Using isqrt-balanced pair: {s} * {target_int // s}")
+    
+    def solve(self, equation, steps=10000000, prefer_integers=False):
+        print(f"\n[Physics Engine] Target Equation: {equation}")
+        
+        lhs_str, rhs_str = equation.split('=')
+        
+        # 1. Parse Target Safely - Handle large integers exactly
+        target_int, target_val = self._parse_target(rhs_str)
         
         if target_val is None or target_val == float('inf'):
             print("[System] Target too large or invalid. Stopping.")
@@ -165,9 +228,13 @@ class AstroPhysicsSolver:
         else:
             print(f"[System] Target approximate: {target_val}")
             
-        # 2. Initialize Variables
-        import re
-        tokens = set(re.findall(r'[a-zA-Z_]+', lhs_str))
+        # 2. Compile LHS once and initialize variables
+        try:
+            lhs_fn = CompiledEquation(lhs_str)
+        except ValueError as exc:
+            print(f"[System] {exc}. Stopping.")
+            return {}
+        tokens = lhs_fn.names
         num_vars = len(tokens) if len(tokens) > 0 else 1
         
         # Guess start magnitude (e.g. target 10^300, vars should be 10^100)
@@ -176,16 +243,33 @@ class AstroPhysicsSolver:
         for t in tokens:
             if t not in self.variables:
                 self.create_var(t, rough_magnitude=estimated_scale)
+
+        # Closed-form log-space start for monomial LHS forms (skips annealing)
+        seed = lhs_fn.log_space_seed(log_target)
+        if seed is not None:
+            try:
+                seed_vals = [10.0 ** u for u in seed]
+            except OverflowError:
+                seed_vals = None
+            if seed_vals is not None:
+                print(f"[Monomial] Closed-form log-space seed for {len(tokens)} variables")
+                for name, val in zip(tokens, seed_vals):
+                    self.variables[name].val = val
+                    self.variables[name].velocity = 0.0
             
         # 3. Annealing Loop
+        # The LHS variables occupy one block of the state arrays, which the
+        # loop reads and updates in place; no per-step dicts.
+        block = self.state.block(tokens)
+        force = np.empty(len(tokens))
+
         for _ in range(steps):
-            vals = {n: d.val for n, d in self.variables.items()}
-            
-            # Evaluate LHS
+            # Evaluate LHS and its log-log slopes in one forward-mode pass
             try:
-                current_lhs = eval(lhs_str, {}, vals)
+                current_lhs, sensitivities = lhs_fn.log_gradient(self.state.val[block].tolist())
             except OverflowError:
                 current_lhs = float('inf')
+                sensitivities = [0.0] * len(tokens)
             
             # Current Log Magnitude
             if current_lhs <= 0:
@@ -202,65 +286,97 @@ class AstroPhysicsSolver:
             if abs(error) < 1e-8:
                 break
                 
-            # 4. Sensitivity Analysis (Gradient Free)
-            perturbation = 1.00001
-            log_perturb_delta = math.log10(perturbation)
-            
-            for name in tokens:
-                domain = self.variables[name]
-                orig = domain.val
-                
-                # Test perturbation
-                domain.val = orig * perturbation
-                
-                vals_new = {n: v.val for n, v in self.variables.items()}
-                try:
-                    lhs_new = eval(lhs_str, {}, vals_new)
-                    if lhs_new <= 0:
-                        lhs_new = 1e-100
-                    log_new = math.log10(lhs_new)
-                except Exception:
-                    log_new = log_current
-                
-                # Sensitivity in log-log space
-                sensitivity = (log_new - log_current) / log_perturb_delta
-                domain.val = orig
-                
-                if abs(sensitivity) < 0.001:
-                    sensitivity = 1.0
-                
-                force = -error / sensitivity
-                force *= 50.0  # gain
-                domain.update_multiplicative(force, dt=0.001)
+            # 4. Sensitivity Analysis (exact slopes from automatic differentiation)
+            force[:] = [sens if abs(sens) >= 0.001 else 1.0 for sens in sensitivities]
+            np.divide(-error * 50.0, force, out=force)  # gain
+            self.state.update_multiplicative(block, force, dt=0.001)
         
         # Get floating-point results
-        float_res = {n: d.val for n, d in self.variables.items()}
+        float_res = self.state.as_dict()
         
         # If preferring integers and simple x * y = N
-        if prefer_integers and target_int is not None and len(tokens) == 2:
-            if 'x' in tokens and 'y' in tokens:
-                approx_x = float_res['x']
-                approx_y = float_res['y']
-                
-                # Try to find exact integer factors near the float solution
-                int_pair = self._find_integer_factors(target_int, approx_x, approx_y)
-                if int_pair:
-                    a, b = int_pair
-                    # Order them so a <= b
-                    if a > b:
-                        a, b = b, a
-                    float_res['x'] = a
-                    float_res['y'] = b
-                    print(f"[Integer Mode] Using integer pair: {a} * {b} = {a*b}")
-                else:
-                    # As a last resort, use isqrt-based balanced pair
-                    s = math.isqrt(target_int)  # exact floor sqrt [web:65]
-                    float_res['x'] = s
-                    float_res['y'] = target_int // s
-                    print(f"[Approx Integer Mode] Using isqrt-balanced pair: {s} * {target_int // s}")
+        if prefer_integers and target_int is not None and lhs_fn.is_xy_product():
+            self._apply_integer_mode(float_res, target_int, tokens)
         
         return float_res
 
+    def solve_many(self, equations, steps=10000000, prefer_integers=False):
+        """
+        Batched solve. Equations sharing an LHS run together as one
+        (targets x variables) NumPy state through anneal_batch, so throughput
+        scales with the batch instead of per-equation Python loops.
+        Returns one result dict per equation, in input order ({} if invalid).
+        """
+        results = [{} for _ in equations]
+        parsed = []
+        for idx, equation in enumerate(equations):
+            lhs_str, rhs_str = equation.split('=')
+            target_int, target_val = self._parse_target(rhs_str)
+            if target_val is None or target_val == float('inf'):
+                continue
+            parsed.append((idx, lhs_str.strip(), target_int, target_val))
+        
+        # Integer x * y = N targets sharing a prime with another target are split
+        # by one batch GCD and go straight to the integer result, skipping the annealer
+        shared = {}
+        products = {}  # idx -> N for the x * y = N equations fed to the batch GCD
+        if prefer_integers:
+            is_product = {}
+            for idx, lhs_str, target_int, _ in parsed:
+                if lhs_str not in is_product:
+                    try:
+                        is_product[lhs_str] = CompiledEquation(lhs_str).is_xy_product()
+                    except ValueError:
+                        is_product[lhs_str] = False
+                if target_int is not None and is_product[lhs_str]:
+                    products[idx] = target_int
+            shared = shared_factor_pairs(products.values())
+            print(f"\n[Batch GCD] {len(shared)} integer targets share a prime with another target")
+        
+        groups = {}
+        for idx, lhs_str, target_int, target_val in parsed:
+            if products.get(idx) in shared:
+                a, b = shared[target_int]
+                results[idx] = {'x': a, 'y': b}
+                print(f"[Batch GCD] Using integer pair: {a} * {b} = {target_int}")
+                continue
+            log_target = math.log10(target_val) if target_val > 0 else -100
+            groups.setdefault(lhs_str, []).append((idx, target_int, log_target))
+        
+        print(f"\n[Batch Engine] {len(equations)} equations in {len(groups)} LHS groups")
+        
+        for lhs_str, members in groups.items():
+            try:
+                lhs_fn = CompiledEquation(lhs_str)
+            except ValueError as exc:
+                print(f"[System] {exc}. Skipping {len(members)} equations.")
+                continue
+            tokens = lhs_fn.names
+            num_vars = len(tokens) if len(tokens) > 0 else 1
+            if not tokens:
+                continue
+            
+            # Closed-form seed where available, else the balanced magnitude guess
+            log_targets = np.array([m[2] for m in members])
+            log_vals = np.empty((len(members), len(tokens)))
+            for row, log_target in enumerate(log_targets):
+                seed = lhs_fn.log_space_seed(log_target)
+                log_vals[row] = seed if seed is not None else log_target / num_vars
+            with np.errstate(over='ignore'):
+                vals = 10.0 ** log_vals
+            
+            iterations = anneal_batch(lhs_fn, log_targets, vals, steps, gain=50.0, dt=0.001)
+            print(f"[Batch Engine] '{lhs_str}': {len(members)} targets, "
+                  f"max iterations {int(iterations.max())}")
+            
+            for row, (idx, target_int, _) in enumerate(members):
+                float_res = {name: float(vals[row, i]) for i, name in enumerate(tokens)}
+                if prefer_integers and target_int is not None and lhs_fn.is_xy_product():
+                    self._apply_integer_mode(float_res, target_int, tokens)
+                results[idx] = float_res
+        
+        return results
+
 # ==========================================
 # 3. ASTRONOMICAL DEMONSTRATION
 # ==========================================
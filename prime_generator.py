@@ -1,11 +1,15 @@
 import numpy as np
 import math
+import os
 import warnings
 import sys
-import random
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal, getcontext
 
+from astro_primes import is_probable_prime, small_factor, small_factor_batch, small_primes
+
 # ==========================================
 # CONFIGURATION
 # ==========================================
@@ -28,36 +32,17 @@ def find_factor_under_100(n):
     Returns 'p' if found (meaning n is Composite).
     Returns None if no small factor exists.
     """
-    # We iterate 2 through 99
-    # Optimization: We only really need to check primes, but brute force 2..99 is fast enough
-    for p in range(2, 100):
-        if n % p == 0:
-            return p
-    return None
+    # One gcd with the primorial 2*3*5*...*97 instead of 98 big-integer modulos
+    return small_factor(n, 100)
 
 # ==========================================
 # 2. PHYSICS SOLVER CLASS
 # ==========================================
 
 class AstroPhysicsSolver:
-    def _miller_rabin_check(self, n, k=5):
-        """Final confirmation step."""
-        if n == 2 or n == 3: return True
-        if n % 2 == 0 or n < 2: return False
-        r, d = 0, n - 1
-        while d % 2 == 0:
-            r += 1
-            d //= 2
-        for _ in range(k):
-            a = random.randint(2, n - 2)
-            x = pow(a, d, n)
-            if x == 1 or x == n - 1: continue
-            for _ in range(r - 1):
-                x = pow(x, 2, n)
-                if x == n - 1: break
-            else:
-                return False
-        return True
+    def _bpsw_check(self, n):
+        """Final confirmation step (deterministic Baillie-PSW, cached)."""
+        return is_probable_prime(n)
 
     def is_prime_candidate(self, target_int):
         """
@@ -72,53 +57,164 @@ class AstroPhysicsSolver:
             # Discard immediately
             return False, f"Failed (Divisible by {small_p})"
             
-        # PHASE 2: DEEP CHECK (Miller-Rabin)
+        # PHASE 2: DEEP CHECK (Baillie-PSW)
         # If it survived Phase 1, it has no small factors. 
         # Now we check if it is truly prime.
-        if self._miller_rabin_check(target_int):
+        if self._bpsw_check(target_int):
             return True, "PRIME CONFIRMED"
         else:
             return False, "Failed (Composite with large factors)"
 
 # ==========================================
-# 3. THE PRIME GENERATOR LOOP
+# 3. SEGMENTED SIEVE FRONT-END
 # ==========================================
 
-def generate_primes(start_num, count_needed=10):
+SIEVE_BOUND = 1 << 20   # strike candidates with a prime factor below this
+SIEVE_WINDOW = 1 << 15  # odd candidates per window
+
+
+def sieve_windows(start_num, sieve_bound=SIEVE_BOUND, window=SIEVE_WINDOW):
+    """
+    Streams windows of odd candidates [base, base + 2*window) from start_num on.
+    start mod p is computed once per odd prime p < sieve_bound; each window then
+    strikes multiples in a NumPy boolean array and shifts the offsets along.
+    Yields (base, survivors) where survivors are the ints with no small factor.
+    """
+    primes = small_primes(sieve_bound)[1:]
+    base = start_num | 1
+    # Index i <-> base + 2i; p | base + 2i  <=>  i = -base / 2 (mod p)
+    offsets = np.array([(p - base % p) * ((p + 1) // 2) % p for p in primes.tolist()], dtype=np.int64)
+    split = int(np.searchsorted(primes, window, side='right'))
+    stepped = primes[:split].tolist()
+
+    while True:
+        sieve = np.ones(window, dtype=bool)
+        for p, first in zip(stepped, offsets[:split].tolist()):
+            sieve[first::p] = False
+        # Primes above the window size strike at most once
+        large = offsets[split:]
+        sieve[large[large < window]] = False
+        if base < sieve_bound:
+            # The sieve primes themselves are not composite
+            inside = primes[(primes >= base) & (primes < base + 2 * window)]
+            sieve[(inside - base) // 2] = True
+            if base == 1:
+                sieve[0] = False
+        yield base, [base + 2 * i for i in np.flatnonzero(sieve).tolist()]
+        base += 2 * window
+        offsets = (offsets - window) % primes
+
+# ==========================================
+# 4. PARALLEL PRIMALITY STREAM
+# ==========================================
+
+PRIMALITY_BATCH = 4  # sieved candidates per pool task
+# From this size on a survivor's BPSW test costs more than reducing
+# primorial(DEEP_SIEVE_BOUND) modulo it, so pool batches first go through the
+# remainder-tree filter (it strikes ~9% of the survivors of a 2^20 sieve)
+DEEP_SIEVE_BITS = 8192
+DEEP_SIEVE_BOUND = 1 << 22
+
+
+def _primality_batch(candidates, sieve_bound=SIEVE_BOUND):
+    """Pool task: the primes among candidates (in order)."""
+    if sieve_bound < DEEP_SIEVE_BOUND and candidates and candidates[0].bit_length() >= DEEP_SIEVE_BITS:
+        struck = small_factor_batch(candidates, DEEP_SIEVE_BOUND)
+        candidates = [n for n, p in zip(candidates, struck) if p is None]
     solver = AstroPhysicsSolver()
-    
+    return [n for n in candidates if solver._bpsw_check(n)]
+
+
+def _candidate_batches(start_num, stop, sieve_bound, window, batch):
+    # The sieve only walks odd numbers; 2 goes out ahead of it
+    if start_num <= 2 and (stop is None or stop > 2):
+        yield [2]
+    for _, survivors in sieve_windows(start_num, sieve_bound, window):
+        for i in range(0, len(survivors), batch):
+            chunk = survivors[i:i + batch]
+            if stop is not None and chunk[0] >= stop:
+                return
+            if stop is not None and chunk[-1] >= stop:
+                yield [n for n in chunk if n < stop]
+                return
+            yield chunk
+
+
+def iter_primes(start_num, count_needed=None, stop=None, workers=None,
+                sieve_bound=SIEVE_BOUND, window=SIEVE_WINDOW, batch=PRIMALITY_BATCH):
+    """
+    Yields primes >= start_num in increasing order as they are confirmed.
+    Sieved candidates are fanned out in batches to a ProcessPoolExecutor
+    (in-process when only one worker is available), keeping 2 batches queued
+    per worker; results are consumed in submission order, so output order is
+    preserved. Candidates of DEEP_SIEVE_BITS or more are struck down to
+    DEEP_SIEVE_BOUND by a remainder tree inside each task before BPSW.
+    Stops after count_needed primes or at stop (exclusive), and cancels
+    outstanding batches - also when the caller abandons the iterator.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = _candidate_batches(start_num, stop, sieve_bound, window, batch)
+    found = 0
+
+    if workers == 1:
+        for chunk in batches:
+            for p in _primality_batch(chunk, sieve_bound):
+                yield p
+                found += 1
+                if count_needed is not None and found >= count_needed:
+                    return
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for chunk in batches:
+            pending.append(pool.submit(_primality_batch, chunk, sieve_bound))
+            if len(pending) < 2 * workers:
+                continue
+            for p in pending.popleft().result():
+                yield p
+                found += 1
+                if count_needed is not None and found >= count_needed:
+                    return
+        while pending:
+            for p in pending.popleft().result():
+                yield p
+                found += 1
+                if count_needed is not None and found >= count_needed:
+                    return
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+# ==========================================
+# 5. THE PRIME GENERATOR LOOP
+# ==========================================
+
+def generate_primes(start_num, count_needed=10, sieve_bound=SIEVE_BOUND, window=SIEVE_WINDOW,
+                    workers=None):
     print(f"\n[Prime Generator] Scanning from {str(start_num)[:15]}...")
-    print(f"[Strategy] Discard if p (factor) < 100")
+    print(f"[Strategy] Segmented sieve: discard if p (factor) < {sieve_bound}")
+    if sieve_bound < DEEP_SIEVE_BOUND and start_num.bit_length() >= DEEP_SIEVE_BITS:
+        print(f"[Strategy] Remainder tree: discard if p (factor) < {DEEP_SIEVE_BOUND}")
+    print(f"[Strategy] Baillie-PSW on {workers or os.cpu_count() or 1} worker(s)")
     print("-" * 75)
     print(f"{'OFFSET':<8} | {'RESULT':<30} | {'DETAILS'}")
     print("-" * 75)
     
     primes_found = []
-    current = start_num
-    if current % 2 == 0: current += 1 # Ensure odd start
+    first = start_num | 1 # Ensure odd start
     
-    checked = 0
+    # Safety break for demo: stop after 10000 odd offsets
+    stop = first + 2 * 10001
+    for current in iter_primes(start_num, count_needed, stop, workers, sieve_bound, window):
+        checked = (current - first) // 2
+        print(f"{checked:<8} | ** PRIME DETECTED **           | {str(current)[:20]}...")
+        primes_found.append(current)
     
-    while len(primes_found) < count_needed:
-        is_prime, reason = solver.is_prime_candidate(current)
-        
-        if is_prime:
-            print(f"{checked:<8} | ** PRIME DETECTED **           | {str(current)[:20]}...")
-            primes_found.append(current)
-        else:
-            # Optional: Print failures to show the "Under 100" logic working
-            # We limit print output to keep it readable
-            if "Divisible by" in reason and checked < 10:
-                 print(f"{checked:<8} | Discarded                      | {reason}")
-        
-        current += 2
-        checked += 1
-        
-        # Safety break for demo
-        if checked > 10000: 
-            print("... Limit reached for demo ...")
-            break
-            
+    if len(primes_found) < count_needed:
+        print("... Limit reached for demo ...")
     return primes_found
 
 # ==========================================
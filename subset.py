@@ -2,8 +2,18 @@ import numpy as np
 import math
 import warnings
 import sys
+import time
 import random  # For randomization
 
+from astro_checkpoint import Checkpointer, load_checkpoint
+from astro_equation import CompiledEquation
+from astro_factor import DEFAULT_STRATEGIES, WORD_LIMIT, divisors, factor_word_primes, fermat_lehman, find_factor
+from astro_primes import small_factor
+from astro_scan import parallel_scan_divisor, wheel
+from astro_state import AstroState
+from astro_subset import (MEET_IN_THE_MIDDLE_METHODS, SUBSET_MEMORY_BUDGET, SUBSET_SUM_METHODS, choose_subset_method,
+                          plan_subset_sum)
+
 sys.setrecursionlimit(2000)
 warnings.filterwarnings("ignore")
 
@@ -12,33 +22,40 @@ warnings.filterwarnings("ignore")
 # ==========================================
 
 class AstroDomain:
-    def __init__(self, name, initial_scale=10.0):
-        self.name = name
+    """Thin view onto one slot of an AstroState (values live in the state arrays)."""
+    __slots__ = ('state', 'slot')
+
+    def __init__(self, name, initial_scale=10.0, state=None):
+        self.state = state if state is not None else AstroState(capacity=1)
         # Initialize to scale for better convergence on balanced factors
-        self.val = initial_scale
-        self.velocity = 0.0
+        self.slot = self.state.add(name, initial_scale)
+
+    @property
+    def name(self):
+        return self.state.names[self.slot]
+
+    @property
+    def val(self):
+        return float(self.state.val[self.slot])
+
+    @val.setter
+    def val(self, value):
+        self.state.val[self.slot] = value
+
+    @property
+    def velocity(self):
+        return float(self.state.velocity[self.slot])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.state.velocity[self.slot] = value
         
     def update_multiplicative(self, factor, dt):
         """
         Updates value by a multiplicative factor (safe for huge numbers).
-        val_new = val_old * (1 + speed * dt)
+        val_new = val_old * (1 + speed * dt), damped velocity, step capped at 10%.
         """
-        # Damping on the factor itself to prevent oscillation
-        # We treat 'velocity' here as 'rate of exponential growth'
-        target_velocity = factor
-        self.velocity = (self.velocity * 0.8) + (target_velocity * 0.2)
-        
-        # Cap the step size to 10% growth per tick to ensure stability
-        step_change = np.clip(self.velocity * dt, -0.1, 0.1)
-        
-        # Apply update: val = val * (1 + change)
-        try:
-            self.val *= (1.0 + step_change)
-        except OverflowError:
-            self.val = float('inf')
-
-        # Safety floor
-        if self.val < 1e-100: self.val = 1e-100
+        self.state.update_multiplicative(self.slot, factor, dt)
 
 # ==========================================
 # 2. LOG-SCALE MATH ENGINE (Extended for Subset Sum)
@@ -46,16 +63,57 @@ class AstroDomain:
 
 class AstroPhysicsSolver:
     def __init__(self):
+        self.state = AstroState()
         self.variables = {}
+        # Pluggable factor-search stages and their shared wall-clock budget (seconds)
+        self.factor_strategies = list(DEFAULT_STRATEGIES)
+        self.factor_time_budget = 30.0
+        # First integer stage: Fermat/Lehman on the annealer's hint, capped in steps and seconds
+        self.fermat_max_steps = 10000000
+        self.near_square_seconds = 2.0
+        # Processes for the trial-division scans (None = one per CPU)
+        self.scan_workers = None
+        # Cap on wheel candidates in the local scan window (None = the full search_radius)
+        self.scan_max_candidates = None
+        # Peak-memory cap (bytes) for the exact subset-sum DP
+        self.subset_memory_budget = SUBSET_MEMORY_BUDGET
+        # Annealing steps and factor-search stage of the last multiplication solve
+        self.last_iterations = 0
+        self.last_factor_method = None
         
     def create_var(self, name, rough_magnitude):
-        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude)
+        self.variables[name] = AstroDomain(name, initial_scale=rough_magnitude, state=self.state)
+    
+    def _near_square_pair(self, target_int, approx_x):
+        """Fermat/Lehman search centred on the hint approx_x. Returns (x, y) with x <= y, or None."""
+        deadline = time.monotonic() + min(self.near_square_seconds, self.factor_time_budget)
+        factor = fermat_lehman(target_int, deadline, self.fermat_max_steps, hint=approx_x)
+        if factor is None:
+            return None
+        pair = (min(factor, target_int // factor), max(factor, target_int // factor))
+        print(f"[Near-Square] Fermat/Lehman found {pair[0]} * {pair[1]}")
+        return pair
+    
+    def _word_factor_pair(self, target_int, approx_x, approx_y):
+        """
+        N < 2^64: full factorization through the word-sized fast path, then the
+        divisor pair closest to the approximate solution. (1, N) for prime N.
+        """
+        primes = factor_word_primes(target_int)
+        pairs = [(d, target_int // d) for d in divisors(primes) if d * d <= target_int]
+        best = min(pairs, key=lambda pair: abs(pair[0] - approx_x) + abs(pair[1] - approx_y))
+        print(f"[Word Fast Path] {target_int} = {' * '.join(map(str, primes))} -> {best[0]} * {best[1]}")
+        return best
     
-    def _find_integer_factors(self, target_int, approx_x, approx_y, search_radius=10000000000):
+    def _find_integer_factors(self, target_int, approx_x, approx_y, search_radius=10000000000,
+                              on_scan_progress=None, resume_scan=None):
         """
         For integer targets and simple x * y = N equations, find exact integer factors
         close to the approximate floating-point solutions, prioritizing balance.
         Assumes two variables x and y, with x <= y.
+        on_scan_progress({'phase', 'cursor'}) reports the trial scans' restart point;
+        resume_scan (such a dict from a checkpoint) skips the finished stages and
+        restarts that scan at its cursor.
         """
         if target_int <= 0:
             return None
@@ -64,148 +122,148 @@ class AstroPhysicsSolver:
         if approx_x > approx_y:
             approx_x, approx_y = approx_y, approx_x
         
+        # Word-sized targets factor completely in milliseconds - no scans needed
+        if target_int < WORD_LIMIT:
+            self.last_factor_method = 'word'
+            return self._word_factor_pair(target_int, approx_x, approx_y)
+        
         best_pair = None
-        min_diff = float('inf')
         
         sqrt_n = math.isqrt(target_int)
         
-        # Local search near approximations for balanced factors (downward for priority)
-        start = max(1, int(approx_x) - search_radius)
-        end = min(int(approx_x) + search_radius, sqrt_n)
+        # Stages already finished before a checkpoint are skipped on resume
+        resume_phase = resume_scan['phase'] if resume_scan else None
+        def scan_progress(phase):
+            if on_scan_progress is None:
+                return None
+            return lambda cursor: on_scan_progress({'phase': phase, 'cursor': cursor})
+        
+        # Near-square search first (not re-run on resume: it finished before any scan began):
+        # Fermat/Lehman from the annealer's balanced hint, under its own step and time cap
+        if resume_phase is None:
+            best_pair = self._near_square_pair(target_int, approx_x)
+            if best_pair is not None:
+                self.last_factor_method = 'near_square'
+        
+        if best_pair is None and resume_phase != 'small':
+            # Local search near approximations for balanced factors (downward for priority):
+            # wheel-skipped chunks on a process pool, the first divisor below end wins.
+            end = min(int(approx_x) + search_radius, sqrt_n)
+            start = max(1, int(approx_x) - search_radius)
+            if self.scan_max_candidates is not None:
+                modulus, residues = wheel(target_int)
+                start = max(start, end - self.scan_max_candidates * modulus // len(residues))
+            if resume_phase == 'local':
+                end = min(end, resume_scan['cursor'])
+        
+            cand_x = parallel_scan_divisor(target_int, start, end, descending=True,
+                                           workers=self.scan_workers, progress=scan_progress('local'))
+            if cand_x is not None:
+                best_pair = (cand_x, target_int // cand_x)
+                self.last_factor_method = 'local_scan'
         
-        for cand_x in range(end, start - 1, -1):
-            if target_int % cand_x == 0:
-                cand_y = target_int // cand_x
-                if cand_x <= cand_y:
-                    diff = abs(cand_x - approx_x) + abs(cand_y - approx_y)
-                    if diff < min_diff:
-                        min_diff = diff
-                        best_pair = (cand_x, cand_y)
+        # Strategy chain (Pollard-Brent rho, ECM, ...) under the configured time budget
+        if best_pair is None and sqrt_n > 1 and resume_phase != 'small':
+            factor, method = find_factor(target_int, self.factor_strategies, self.factor_time_budget)
+            if factor is not None:
+                best_pair = (min(factor, target_int // factor), max(factor, target_int // factor))
+                self.last_factor_method = method
+                print(f"[Strategy Chain] {method} found {best_pair[0]} * {best_pair[1]}")
         
-        # Fallback: Limited downward for balanced, then small trial for any pair
+        # Fallback: small trial for any pair - primes below 2^20 via one primorial gcd,
+        # then a linear scan beyond the primorial bound
         if best_pair is None:
-            max_checks = 10000000000
-            checks = 0
-            for i in range(sqrt_n, max(sqrt_n - max_checks, 1), -1):
-                if target_int % i == 0:
-                    j = target_int // i
-                    if i <= j:
-                        best_pair = (i, j)
-                    break
-                checks += 1
-            
-            if best_pair is None:
-                # Small trial for factor
-                small_max = 10000000000
+            small_max = 10000000000
+            small = small_factor(target_int, 1 << 20)
+            if small is not None and small > sqrt_n:
                 small = None
-                for i in range(2, min(small_max + 1, sqrt_n + 1)):
-                    if target_int % i == 0:
-                        small = i
-                        break
-                if small:
-                    j = target_int // small
-                    best_pair = (min(small, j), max(small, j))
-                else:
-                    best_pair = (1, target_int)
+            if small is None:
+                scan_start = resume_scan['cursor'] if resume_phase == 'small' else 1 << 20
+                small = parallel_scan_divisor(target_int, scan_start, min(small_max, sqrt_n),
+                                              workers=self.scan_workers, progress=scan_progress('small'))
+            if small:
+                j = target_int // small
+                best_pair = (min(small, j), max(small, j))
+                self.last_factor_method = 'small_factor'
+            else:
+                best_pair = (1, target_int)
+                self.last_factor_method = 'none'
         
         return best_pair
     
     def _solve_subset_sum_exact(self, numbers, target):
         """
-        Exact dynamic programming for subset sum (O(n*target), feasible for small target/n).
+        Exact dynamic programming for subset sum (O(n*target) bit operations on a
+        big-integer reachability bitset, see astro_subset). Checkpointed layers
+        when they fit in self.subset_memory_budget, Hirschberg splitting otherwise.
         Returns subset list or None if impossible.
         """
-        if target == 0:
-            return []
-        n = len(numbers)
-        if n == 0 or target < 0:
-            return None
-        dp = [False] * (target + 1)
-        dp[0] = True
-        prev = [-1] * (target + 1)
-        for num in numbers:
-            for s in range(target, num - 1, -1):
-                if not dp[s] and dp[s - num]:
-                    dp[s] = True
-                    prev[s] = s - num
-        if not dp[target]:
-            return None
-        # Reconstruct subset
-        subset = []
-        s = target
-        while s > 0:
-            prev_s = prev[s]
-            if prev_s == -1:
-                break  # Error
-            num = s - prev_s
-            subset.append(num)
-            s = prev_s
-        return subset
+        method, footprint = plan_subset_sum(len(numbers), max(target, 0), self.subset_memory_budget)
+        print(f"[Exact DP] {method} reconstruction, estimated peak memory {footprint / 2**20:.1f} MiB")
+        return SUBSET_SUM_METHODS[method](numbers, target)
     
-    def _solve_subset_sum_annealing(self, numbers, target, steps=1000000):
+    def _solve_subset_sum_annealing(self, numbers, target, steps=1000000, sweeps_per_cycle=200):
         """
-        Annealing heuristic: Treat each number as a continuous [0,1] inclusion probability.
-        Optimize sum(inclusion_i * numbers_i) to target; threshold to binary {0,1} post-annealing.
-        Error = |current_sum - target|; forces adjust inclusions.
+        Binary-flip Metropolis annealing: the inclusion bits live in a bytearray
+        and the subset sum is kept as a running total, so a proposed flip costs
+        O(1) and a sweep (n proposals) O(n). Energy is |sum - target|; the
+        temperature cools geometrically from the mean item size to 0.5 over
+        sweeps_per_cycle sweeps, then reheats from the best state seen.
+        steps counts sweeps. Returns the subset only if it hits target exactly.
         """
         n = len(numbers)
-        # Initialize variables as inclusions (0-1 scale)
-        for i in range(n):
-            var_name = f'incl_{i}'
-            self.create_var(var_name, rough_magnitude=0.5)  # Random start ~0.5
+        if n == 0:
+            return [] if target == 0 else None
+        rng = np.random.default_rng()
+        weights = [int(num) for num in numbers]
         
+        # Random start with the expected sum near target
+        total = sum(abs(num) for num in weights) or 1
+        incl = bytearray((rng.random(n) < min(1.0, abs(target) / total)).astype(np.uint8).tobytes())
+        current_sum = sum(num for num, bit in zip(weights, incl) if bit)
+        energy = abs(current_sum - target)
+        best_energy, best_incl = energy, bytes(incl)
+        
+        t_hot = max(1.0, total / n)
+        cooling = (0.5 / t_hot) ** (1.0 / max(1, sweeps_per_cycle - 1))
         for t in range(steps):
-            vals = {n: d.val for n, d in self.variables.items()}
-            current_sum = sum(vals[f'incl_{i}'] * numbers[i] for i in range(n))
-            
-            error = abs(current_sum - target)
-            if error < 1e-6:  # Near exact
+            if energy == 0:
                 break
-            
-            # Sensitivity: Perturb each inclusion and measure sum change
-            perturbation = 0.01  # Small additive for [0,1]
-            for i in range(n):
-                name = f'incl_{i}'
-                domain = self.variables[name]
-                orig = domain.val
-                clamped_orig = np.clip(orig, 0.0, 1.0)
-                
-                # Perturb up (if room)
-                domain.val = min(1.0, clamped_orig + perturbation)
-                sum_new_up = sum(self.variables[f'incl_{j}'].val * numbers[j] for j in range(n))
-                sens_up = (sum_new_up - current_sum) / perturbation if perturbation > 0 else 0
-                
-                # Perturb down (if room)
-                domain.val = max(0.0, clamped_orig - perturbation)
-                sum_new_down = sum(self.variables[f'incl_{j}'].val * numbers[j] for j in range(n))
-                sens_down = (sum_new_down - current_sum) / (-perturbation) if perturbation > 0 else 0
-                
-                # Average sensitivity (change per unit inclusion)
-                sensitivity = (sens_up + sens_down) / 2.0
-                if abs(sensitivity) < 1e-6:
-                    sensitivity = numbers[i]  # Default: full weight
-                
-                # Force: Push towards target (positive if undersum, negative if oversum)
-                force = (target - current_sum) / sensitivity if sensitivity != 0 else 0
-                force *= 0.1  # Damp for stability
-                
-                # Update additively (for [0,1]), clamp
-                domain.update_multiplicative(force, dt=0.01)  # Reuse, but clamp after
-                domain.val = np.clip(domain.val, 0.0, 1.0)
-                
-                # Restore for next? No, apply sequentially but clamp each time
+            if t % sweeps_per_cycle == 0 and t:
+                # Reheat from the best state
+                incl[:] = best_incl
+                current_sum = sum(num for num, bit in zip(weights, incl) if bit)
+                energy = best_energy
+            temperature = t_hot * cooling ** (t % sweeps_per_cycle)
+            # Metropolis: accept a flip when dE < -T ln(u), u uniform in (0, 1]
+            thresholds = (-temperature * np.log1p(-rng.random(n))).tolist()
+            for i, threshold in zip(rng.integers(0, n, n).tolist(), thresholds):
+                delta = -weights[i] if incl[i] else weights[i]
+                new_energy = abs(current_sum + delta - target)
+                if new_energy - energy < threshold or new_energy <= energy:
+                    incl[i] ^= 1
+                    current_sum += delta
+                    energy = new_energy
+                    if energy < best_energy:
+                        best_energy, best_incl = energy, bytes(incl)
+                        if energy == 0:
+                            break
         
-        # Threshold to binary and get subset
-        inclusions = {name: round(np.clip(val, 0.0, 1.0)) for name, val in {n: d.val for n, d in self.variables.items()}.items() if name.startswith('incl_')}
-        subset = [numbers[i] for i in range(n) if inclusions[f'incl_{i}'] == 1]
-        approx_sum = sum(subset)
-        return subset if approx_sum == target else None  # Only if exact
+        if best_energy != 0:
+            return None
+        return [num for num, bit in zip(numbers, best_incl) if bit]
     
-    def solve(self, equation, steps=1000000000, prefer_integers=False, subset_numbers=None, subset_target=None):
+    def solve(self, equation, steps=1000000000, prefer_integers=False, subset_numbers=None, subset_target=None,
+              checkpoint_path=None, checkpoint_interval=30.0, resume_from=None):
         """
         Solve multiplication equation or subset sum.
         - For multiplication: As before ("x * y = N").
-        - For subset sum: Pass subset_numbers=list, subset_target=int. Uses annealing + exact DP fallback.
+        - For subset sum: Pass subset_numbers=list, subset_target=int. Exact DP or meet in the middle
+          (chosen by estimated work), then annealing.
+        - Multiplication mode checkpoints the variable state, iteration counter and
+          factor-scan cursor to checkpoint_path (atomically, at most every
+          checkpoint_interval seconds, and on Ctrl-C); resume_from=path continues
+          from such a checkpoint.
         Returns {'subset': [nums]} or factors dict.
         """
         if subset_numbers is not None and subset_target is not None:
@@ -213,13 +271,22 @@ class AstroPhysicsSolver:
             print(f"\n[Subset Sum Mode] Numbers: {subset_numbers}, Target: {subset_target}")
             print(f"[System] Set size: {len(subset_numbers)}, Target magnitude: {subset_target}")
             
-            # Try exact DP first (if feasible, e.g., target < 10^5)
-            if subset_target <= 10000000000 and len(subset_numbers) <= 10000000000:
+            # Exact stage with the least estimated work: bitset DP for moderate
+            # targets, meet in the middle for small sets with any target
+            exact_method = choose_subset_method(len(subset_numbers), subset_target)
+            if exact_method == 'dp':
                 exact_subset = self._solve_subset_sum_exact(subset_numbers, subset_target)
                 if exact_subset:
                     print(f"[Exact Solution] Subset: {sorted(exact_subset)} (sum: {sum(exact_subset)})")
                     return {'subset': sorted(exact_subset), 'method': 'exact_dp'}
                 print("[Exact DP] No solution found.")
+            elif exact_method is not None:
+                print(f"[Meet in the Middle] {exact_method} over {len(subset_numbers)} numbers")
+                exact_subset = MEET_IN_THE_MIDDLE_METHODS[exact_method](subset_numbers, subset_target)
+                if exact_subset is not None:
+                    print(f"[Exact Solution] Subset: {sorted(exact_subset)} (sum: {sum(exact_subset)})")
+                    return {'subset': sorted(exact_subset), 'method': exact_method}
+                print("[Meet in the Middle] No solution found.")
             
             # Annealing heuristic
             anneal_subset = self._solve_subset_sum_annealing(subset_numbers, subset_target, steps)
@@ -233,6 +300,18 @@ class AstroPhysicsSolver:
         # Original Multiplication Mode
         print(f"\n[Physics Engine] Target Equation: {equation}")
         
+        resume = None
+        if resume_from is not None:
+            resume = load_checkpoint(resume_from)
+            if resume.get('equation') != equation:
+                print(f"[Checkpoint] {resume_from} is for '{resume.get('equation')}', not this equation. Stopping.")
+                return {}
+            print(f"[Checkpoint] Resuming from {resume_from}: stage {resume['stage']}, "
+                  f"iteration {resume['iteration']}")
+        checkpointer = None
+        if checkpoint_path is not None:
+            checkpointer = Checkpointer(checkpoint_path, checkpoint_interval)
+        
         lhs_str, rhs_str = equation.split('=')
         
         # 1. Parse Target Safely - Handle large integers exactly
@@ -276,9 +355,13 @@ class AstroPhysicsSolver:
         else:
             print(f"[System] Target approximate: {target_val}")
             
-        # 2. Initialize Variables
-        import re
-        tokens = set(re.findall(r'[a-zA-Z_]+', lhs_str))
+        # 2. Compile LHS once and initialize variables
+        try:
+            lhs_fn = CompiledEquation(lhs_str)
+        except ValueError as exc:
+            print(f"[System] {exc}. Stopping.")
+            return {}
+        tokens = lhs_fn.names
         num_vars = len(tokens) if len(tokens) > 0 else 1
         
         # Guess start magnitude (e.g. target 10^300, vars should be 10^100)
@@ -287,73 +370,87 @@ class AstroPhysicsSolver:
         for t in tokens: 
             if t not in self.variables: 
                 self.create_var(t, rough_magnitude=estimated_scale)
-            
-        # 3. Annealing Loop
-        for t in range(steps):
-            vals = {n: d.val for n, d in self.variables.items()}
-            
-            # Evaluate LHS
+
+        # Closed-form log-space start for monomial LHS forms (skips annealing)
+        seed = lhs_fn.log_space_seed(log_target)
+        if seed is not None:
             try:
-                current_lhs = eval(lhs_str, {}, vals)
+                seed_vals = [10.0 ** u for u in seed]
             except OverflowError:
-                current_lhs = float('inf')
+                seed_vals = None
+            if seed_vals is not None:
+                print(f"[Monomial] Closed-form log-space seed for {len(tokens)} variables")
+                for name, val in zip(tokens, seed_vals):
+                    self.variables[name].val = val
+                    self.variables[name].velocity = 0.0
+        
+        first_step = 0
+        if resume is not None:
+            self.state.restore(resume['state'])
+            first_step = resume['iteration']
+        
+        def snapshot(stage, iteration, scan=None):
+            return {'equation': equation, 'stage': stage, 'iteration': iteration,
+                    'state': self.state.snapshot(), 'scan': scan}
             
-            # Current Log Magnitude
-            if current_lhs <= 0: current_lhs = 1e-100
+        # 3. Annealing Loop
+        # The LHS variables occupy one block of the state arrays, which the
+        # loop reads and updates in place; no per-step dicts.
+        block = self.state.block(tokens)
+        force = np.empty(len(tokens))
+        
+        # Checkpoints are time-throttled: checking the clock is the only per-step cost
+        t = self.last_iterations = first_step
+        self.last_factor_method = None
+        if resume is None or resume['stage'] == 'anneal':
+            self.last_iterations = steps
             try:
-                log_current = math.log10(current_lhs)
-            except ValueError:
-                log_current = -100
-                
-            # ERROR: Difference in Orders of Magnitude
-            error = log_current - log_target
+                for t in range(first_step, steps):
+                    if checkpointer is not None and checkpointer.due():
+                        checkpointer.save(snapshot('anneal', t))
+
+                    # Evaluate LHS and its log-log slopes in one forward-mode pass
+                    try:
+                        current_lhs, sensitivities = lhs_fn.log_gradient(self.state.val[block].tolist())
+                    except OverflowError:
+                        current_lhs = float('inf')
+                        sensitivities = [0.0] * len(tokens)
             
-            # Exit condition (Precision to 8 decimal places of exponent)
-            if abs(error) < 1e-8:
-                break
+                    # Current Log Magnitude
+                    if current_lhs <= 0: current_lhs = 1e-100
+                    try:
+                        log_current = math.log10(current_lhs)
+                    except ValueError:
+                        log_current = -100
                 
-            # 4. Sensitivity Analysis (Gradient Free)
-            # We determine power law relationship without exploding math.
-            # How much does LHS change if input changes by 0.1%?
-            perturbation = 1.001 # 0.1% change
-            log_perturb_delta = math.log10(perturbation) # Constant small number
+                    # ERROR: Difference in Orders of Magnitude
+                    error = log_current - log_target
             
-            for name in tokens:
-                domain = self.variables[name]
-                orig = domain.val
-                
-                # Test perturbation
-                domain.val = orig * perturbation
-                
-                vals_new = {n: v.val for n, v in self.variables.items()}
-                try:
-                    lhs_new = eval(lhs_str, {}, vals_new)
-                    if lhs_new <= 0: lhs_new = 1e-100
-                    log_new = math.log10(lhs_new)
-                except:
-                    log_new = log_current # No change detected
-                
-                # Calculate Power Sensitivity (Slope in Log-Log space)
-                # E.g., for x^2, sensitivity is 2. For x^3, it is 3.
-                sensitivity = (log_new - log_current) / log_perturb_delta
-                
-                # Restore Value
-                domain.val = orig
-                
-                # 5. Apply Force (Multiplicative)
-                # If error is + (too high), we shrink. If - (too low), we grow.
-                # We divide by sensitivity: x^3 needs smaller adjustments than x^1.
-                if abs(sensitivity) < 0.001: sensitivity = 1.0 # Avoid div by zero
-                
-                force = -error / sensitivity 
-                
-                # Scale force for simulation stability
-                force *= 10.0 
+                    # Exit condition (Precision to 8 decimal places of exponent)
+                    if abs(error) < 1e-8:
+                        self.last_iterations = t
+                        break
                 
-                domain.update_multiplicative(force, dt=0.01)
+                    # 4. Sensitivity Analysis (Automatic Differentiation)
+                    # Power Sensitivity (Slope in Log-Log space) per variable, from the
+                    # dual-number pass. E.g., for x^2, sensitivity is 2. For x^3, it is 3.
+                    # Avoid div by zero for flat directions.
+                    force[:] = [sens if abs(sens) >= 0.001 else 1.0 for sens in sensitivities]
+            
+                    # 5. Apply Force (Multiplicative)
+                    # If error is + (too high), we shrink. If - (too low), we grow.
+                    # We divide by sensitivity: x^3 needs smaller adjustments than x^1.
+                    # Scale force (10x) for simulation stability.
+                    np.divide(-error * 10.0, force, out=force)
+                    self.state.update_multiplicative(block, force, dt=0.01)
+            except KeyboardInterrupt:
+                if checkpointer is not None:
+                    checkpointer.save(snapshot('anneal', t))
+                    print(f"[Checkpoint] Interrupted - saved to {checkpoint_path}")
+                raise
         
         # Get floating-point results
-        float_res = {n: d.val for n, d in self.variables.items()}
+        float_res = self.state.as_dict()
         
         # If preferring integers and simple x * y = N
         if prefer_integers and target_int is not None and len(tokens) == 2:
@@ -361,7 +458,20 @@ class AstroPhysicsSolver:
             if 'x' in tokens and 'y' in tokens:
                 approx_x = float_res['x']
                 approx_y = float_res['y']
-                int_pair = self._find_integer_factors(target_int, approx_x, approx_y)
+                scan_state = {'scan': resume['scan'] if resume is not None and resume['stage'] == 'factor' else None}
+                def on_scan_progress(scan):
+                    scan_state['scan'] = scan
+                    if checkpointer is not None:
+                        checkpointer.maybe_save(lambda: snapshot('factor', t, scan))
+                try:
+                    int_pair = self._find_integer_factors(target_int, approx_x, approx_y,
+                                                          on_scan_progress=on_scan_progress,
+                                                          resume_scan=scan_state['scan'])
+                except KeyboardInterrupt:
+                    if checkpointer is not None:
+                        checkpointer.save(snapshot('factor', t, scan_state['scan']))
+                        print(f"[Checkpoint] Interrupted - saved to {checkpoint_path}")
+                    raise
                 if int_pair:
                     # Assign based on approximations for consistency, but prefer larger for x to avoid low
                     pair_small, pair_large = min(int_pair), max(int_pair)
@@ -0,0 +1,33 @@
+import json
+
+import astro_batch
+
+P, Q = 1000000007, 1000000009
+
+
+def run(tmp_path, targets):
+    targets_path = tmp_path / "targets.txt"
+    targets_path.write_text("".join(f"{n}\n" for n in targets))
+    output_path = tmp_path / "results.jsonl"
+    astro_batch.run_batch(str(targets_path), str(output_path), workers=1, steps=2000, time_budget=5.0)
+    return {int(rec['equation'].split('=')[1]): rec
+            for rec in map(json.loads, output_path.read_text().splitlines())}
+
+
+def test_prime_targets_record_no_factors(tmp_path):
+    records = run(tmp_path, [1000003, 999999000001, P * Q])
+    assert records[1000003]['factors'] is None
+    assert records[999999000001]['factors'] is None
+    assert records[P * Q]['factors'] == [P, Q]
+
+
+def test_unfactored_target_records_no_factors(tmp_path, monkeypatch):
+    def no_split(self, target_int, approx_x, approx_y, **kwargs):
+        self.last_factor_method = 'none'
+        return 1, target_int
+
+    monkeypatch.setattr(astro_batch.AstroPhysicsSolver, '_find_integer_factors', no_split)
+    n = (2 ** 61 - 1) * (2 ** 67 + 3)
+    record = run(tmp_path, [n])[n]
+    assert record['factors'] is None
+    assert record['method'] == 'none'
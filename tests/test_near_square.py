@@ -0,0 +1,27 @@
+import prime
+from astro_factor import fermat_lehman
+from astro_primes import is_probable_prime
+
+P, Q = 1000000007, 3000000019
+
+
+def next_prime(n):
+    n += 1
+    while not is_probable_prime(n):
+        n += 1
+    return n
+
+
+def test_fermat_lehman_walk_starts_at_the_hint():
+    # Fermat from sqrt(N) needs ~60M steps for this ratio-3 pair
+    assert fermat_lehman(P * Q, max_steps=1000, max_multiplier=1) is None
+    assert fermat_lehman(P * Q, max_steps=1000, max_multiplier=1, hint=P + 100) == P
+    assert fermat_lehman(P * Q, max_steps=1000, max_multiplier=1, hint=Q - 300) == P
+
+
+def test_near_square_runs_before_the_scan(capsys):
+    p = next_prime(10 ** 20)
+    q = next_prime(p + 10 ** 9)
+    solver = prime.AstroPhysicsSolver()
+    assert solver._find_integer_factors(p * q, p + 1, q - 1) == (p, q)
+    assert "[Near-Square] Fermat/Lehman found" in capsys.readouterr().out
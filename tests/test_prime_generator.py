@@ -0,0 +1,7 @@
+from prime_generator import iter_primes
+
+
+def test_iter_primes_yields_two():
+    assert list(iter_primes(2, 3, workers=1)) == [2, 3, 5]
+    assert list(iter_primes(0, stop=12, workers=2)) == [2, 3, 5, 7, 11]
+    assert list(iter_primes(3, 3, workers=1)) == [3, 5, 7]
@@ -0,0 +1,20 @@
+import astro_physics_solver
+import prime
+
+P, Q, R = 1000000007, 1000000009, 1000000021
+SHARED = [f"x * y = {P * Q}", f"x * y = {P * R}", f"x + y = {P * Q}"]
+
+
+def test_prime_batch_gcd_only_splits_products():
+    results = prime.AstroPhysicsSolver().solve_many(SHARED, steps=2000, prefer_integers=True)
+    assert results[0] == {'x': P, 'y': Q}
+    assert results[1] == {'x': P, 'y': R}
+    # The sum equation shares its RHS with a split target but is not a product
+    assert results[2] != {'x': P, 'y': Q}
+    assert abs(results[2]['x'] + results[2]['y'] - P * Q) / (P * Q) < 1e-3
+
+
+def test_physics_batch_gcd_only_takes_products(capsys):
+    solver = astro_physics_solver.AstroPhysicsSolver()
+    solver.solve_many(SHARED, steps=2000, prefer_integers=True)
+    assert "[Batch GCD] 2 targets, 2 share a prime" in capsys.readouterr().out